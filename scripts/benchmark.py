@@ -0,0 +1,157 @@
+"""
+This utility script benchmarks the parser offline over the pages in
+tests/html_test_files, timing every stage of fetch() separately, and saves the
+results so runs of different versions can be compared.
+
+    python -m scripts.benchmark --repeat 3 --compare benchmark_results/0.1.6-html.parser.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import time
+import tracemalloc
+from collections import defaultdict
+from functools import wraps
+
+from bs4 import BeautifulSoup
+
+from tests.test_core import test_words, html_test_files_dir, modernize_headings
+from wiktionaryparser import WiktionaryParser
+from wiktionaryparser.core import LANGUAGES, ParseContext, slice_language_sections
+
+current_dir = os.path.dirname(__file__)
+results_dir = os.path.abspath(os.path.join(current_dir, '..', 'benchmark_results'))
+
+PARSE_STAGES = ['parse_examples', 'parse_definitions', 'parse_etymologies',
+                'parse_related_words', 'parse_pronunciations', 'map_to_object']
+STAGES = ['read', 'slice', 'soup', 'clean_html', 'get_word_data'] + PARSE_STAGES + ['pack_definitions_and_examples']
+
+def get_version():
+    try:
+        from importlib.metadata import version
+        return version('wiktionaryparser')
+    except Exception:
+        return 'unknown'
+
+
+def load_corpus():
+    corpus = []
+    for word, old_id, language_code in test_words:
+        filepath = os.path.join(html_test_files_dir, f'{language_code}-{word}-{old_id}.html')
+        with open(filepath, 'r', encoding='utf-8') as f:
+            corpus.append((language_code, word, modernize_headings(f.read())))
+    return corpus
+
+
+def timed(timings, stage, function):
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            timings[stage] += time.perf_counter() - start
+    return wrapper
+
+
+def run_page(parser, timings, language_code, word, html):
+    """Run the steps of WiktionaryParser.fetch() for one page, timing each of them."""
+    language = LANGUAGES[language_code]
+    parser.set_language(language_code)
+    start = time.perf_counter()
+    html = html.replace('>\n<', '><')
+    timings['read'] += time.perf_counter() - start
+    start = time.perf_counter()
+    sliced_html = slice_language_sections(html, [language])
+    timings['slice'] += time.perf_counter() - start
+    start = time.perf_counter()
+    parser.context = ParseContext(BeautifulSoup(sliced_html or html, parser.backend), word)
+    timings['soup'] += time.perf_counter() - start
+    start = time.perf_counter()
+    parser.clean_html(language)
+    timings['clean_html'] += time.perf_counter() - start
+    start = time.perf_counter()
+    result = parser.get_word_data(language)
+    timings['get_word_data'] += time.perf_counter() - start
+    start = time.perf_counter()
+    if isinstance(result, list):
+        parser.pack_definitions_and_examples(result)
+    timings['pack_definitions_and_examples'] += time.perf_counter() - start
+
+
+def run_checked_page(parser, timings, language_code, word, html):
+    # A page that fails would skew the per-page timings, so it stops the run.
+    try:
+        run_page(parser, timings, language_code, word, html)
+    except Exception as e:
+        raise RuntimeError(f"Parsing {language_code}-{word} failed, the timings would not be comparable") from e
+
+
+def run_benchmark(corpus, backend, repeat):
+    timings = defaultdict(float)
+    parser = WiktionaryParser(backend=backend)
+    for stage in PARSE_STAGES:
+        setattr(parser, stage, timed(timings, stage, getattr(parser, stage)))
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for language_code, word, html in corpus:
+            run_checked_page(parser, timings, language_code, word, html)
+    elapsed = time.perf_counter() - start
+    pages = len(corpus) * repeat
+
+    tracemalloc.start()
+    peak = 0
+    for language_code, word, html in corpus:
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        run_checked_page(parser, defaultdict(float), language_code, word, html)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+
+    return {
+        'version': get_version(),
+        'python': platform.python_version(),
+        'backend': backend,
+        'pages': pages,
+        'seconds': elapsed,
+        'pages_per_second': pages / elapsed,
+        'peak_memory_bytes': peak,
+        'stages_ms_per_page': {stage: timings[stage] * 1000 / pages for stage in STAGES},
+    }
+
+
+def print_results(results, previous=None):
+    print(f"wiktionaryparser {results['version']} ({results['backend']}, Python {results['python']})")
+    print(f"{results['pages']} pages, {results['seconds']:.2f}s, "
+          f"{results['pages_per_second']:.1f} pages/s, peak memory {results['peak_memory_bytes'] / 2 ** 20:.1f} MiB")
+    for stage, milliseconds in results['stages_ms_per_page'].items():
+        line = f"  {stage:32} {milliseconds:9.3f} ms/page"
+        if previous and previous['stages_ms_per_page'].get(stage):
+            change = (milliseconds / previous['stages_ms_per_page'][stage] - 1) * 100
+            line += f"  ({change:+.1f}% vs {previous['version']})"
+        print(line)
+
+
+if __name__ == '__main__':
+    argument_parser = argparse.ArgumentParser(description='Benchmark the parser over tests/html_test_files.')
+    argument_parser.add_argument('--backend', default='html.parser', help='BeautifulSoup tree builder')
+    argument_parser.add_argument('--repeat', type=int, default=1, help='number of passes over the corpus')
+    argument_parser.add_argument('--output', help='where to save the results (default: benchmark_results/<version>-<backend>.json)')
+    argument_parser.add_argument('--compare', help='results of an earlier run to compare against')
+    args = argument_parser.parse_args()
+
+    results = run_benchmark(load_corpus(), args.backend, args.repeat)
+    previous = None
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            previous = json.load(f)
+    print_results(results, previous)
+
+    output = args.output or os.path.join(results_dir, f"{results['version']}-{args.backend}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=4)
+    print(f"Saved results to {output}")
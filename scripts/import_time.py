@@ -0,0 +1,64 @@
+"""
+This utility script measures how long a fresh interpreter takes to import the
+parser and to parse its first page, which is what short-lived command line and
+serverless invocations pay on every run.
+
+    python -m scripts.import_time --repeat 10
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+SAMPLE_HTML = (
+    '<div class="mw-heading mw-heading2"><h2 id="English">English</h2></div>'
+    '<div class="mw-heading mw-heading3"><h3 id="Noun">Noun</h3></div>'
+    '<p>test</p><ol><li>A challenge, trial.</li></ol>'
+)
+
+STATEMENTS = {
+    'import': 'import wiktionaryparser',
+    'first parse': (
+        'from wiktionaryparser import WiktionaryParser\n'
+        'parser = WiktionaryParser()\n'
+        'parser.set_language("en")\n'
+        f'parser.parse_html({SAMPLE_HTML!r}, "test")\n'
+        'parser.get_user_agent()'
+    ),
+}
+
+
+def run_once(statement):
+    """Return the cumulative import times in microseconds by module, and the
+    wall time of the whole statement in seconds, for one fresh interpreter."""
+    code = f'import time\nstart = time.perf_counter()\n{statement}\nprint(time.perf_counter() - start)'
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    imports = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, module = line[len('import time:'):].split('|')
+        imports[module.strip()] = int(cumulative)
+    return imports, float(process.stdout.strip().splitlines()[-1])
+
+
+def print_results(name, runs, top):
+    wall_times = [wall_time * 1000 for _, wall_time in runs]
+    print(f"{name}: median {statistics.median(wall_times):.1f} ms, "
+          f"min {min(wall_times):.1f} ms, max {max(wall_times):.1f} ms over {len(runs)} runs")
+    imports, _ = runs[-1]
+    slowest = sorted(imports.items(), key=lambda item: item[1], reverse=True)[:top]
+    for module, microseconds in slowest:
+        print(f"  {module:40} {microseconds / 1000:9.1f} ms")
+
+
+if __name__ == '__main__':
+    argument_parser = argparse.ArgumentParser(description='Measure import and first parse time in fresh interpreters.')
+    argument_parser.add_argument('--repeat', type=int, default=5, help='number of fresh interpreters per measurement')
+    argument_parser.add_argument('--top', type=int, default=10, help='number of slowest imports to list')
+    args = argument_parser.parse_args()
+
+    for name, statement in STATEMENTS.items():
+        print_results(name, [run_once(statement) for _ in range(args.repeat)], args.top)
@@ -19,6 +19,8 @@ setup(
   download_url = 'https://github.com/pragma-/WiktionaryParser/archive/master.zip',
   keywords = ['Parser', 'Wiktionary'],
   install_requires = ['beautifulsoup4','requests'],
+  extras_require = {'async': ['aiohttp'], 'lxml': ['lxml'], 'orjson': ['orjson'], 'brotli': ['brotli']},
+  entry_points = {'console_scripts': ['wiktionaryparser = wiktionaryparser.cli:main']},
   classifiers=[
    'Development Status :: 5 - Production/Stable',
    'License :: OSI Approved :: MIT License',
@@ -0,0 +1,123 @@
+import asyncio
+import threading
+import unittest
+import aiohttp
+from aiohttp import web
+from wiktionaryparser import AsyncWiktionaryParser, MemoryCache
+
+
+class TestAsyncParser(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requested_ids = []
+
+    def tearDown(self):
+        self.loop.close()
+
+    async def handle_word(self, request):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        self.requested_ids.append(request.query.get('oldid'))
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if request.match_info['word'] == 'broken':
+            request.transport.close()
+        if request.match_info['word'] == 'unavailable':
+            return web.Response(status=503, text='<html><body>Service unavailable</body></html>', content_type='text/html')
+        return web.Response(text='<html><body><h2>French</h2></body></html>', content_type='text/html')
+
+    async def run_server(self, coroutine):
+        app = web.Application()
+        app.router.add_get('/wiki/{word}', self.handle_word)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            return await coroutine(f'http://127.0.0.1:{port}/wiki/{{}}')
+        finally:
+            await runner.cleanup()
+
+    def test_fetch_many_bounds_concurrency(self):
+        async def fetch_many(url):
+            async with AsyncWiktionaryParser(max_concurrency=3) as parser:
+                parser.url = url
+                return await parser.fetch_many([f'word{i}' for i in range(12)], old_id=42)
+
+        results = self.loop.run_until_complete(self.run_server(fetch_many))
+
+        self.assertEqual(len(results), 12)
+        self.assertEqual(results['word0'], {'languages': ['French'], 'disambig': []})
+        self.assertLessEqual(self.max_in_flight, 3)
+        self.assertEqual(set(self.requested_ids), {'42'})
+
+    def test_fetch_many_reports_failures_per_word(self):
+        async def fetch(url):
+            async with AsyncWiktionaryParser() as parser:
+                parser.url = url
+                return await parser.fetch_many(['broken', ('chat', None)])
+
+        results = self.loop.run_until_complete(self.run_server(fetch))
+
+        self.assertEqual(results['chat'], {'languages': ['French'], 'disambig': []})
+        self.assertIsInstance(results['broken'], Exception)
+
+    def test_error_pages_are_reported_and_not_cached(self):
+        async def fetch(url):
+            async with AsyncWiktionaryParser(cache=MemoryCache()) as parser:
+                parser.url = url
+                return await parser.fetch_many([('unavailable', 5), ('chat', 5)]), len(parser.cache)
+
+        results, cached = self.loop.run_until_complete(self.run_server(fetch))
+
+        self.assertIsInstance(results['unavailable'], aiohttp.ClientResponseError)
+        self.assertEqual(results['unavailable'].status, 503)
+        self.assertEqual(cached, 1)
+
+    def test_iter_fetch_reads_words_as_results_are_consumed(self):
+        consumed = []
+
+        def words():
+            for i in range(20):
+                consumed.append(i)
+                yield f'word{i}'
+
+        async def iter_fetch(url):
+            parse_threads = set()
+            seen = []
+            async with AsyncWiktionaryParser(max_concurrency=2) as parser:
+                parser.url = url
+                parse_html = parser.parse_html
+
+                def record_thread(*args, **kwargs):
+                    parse_threads.add(threading.get_ident())
+                    return parse_html(*args, **kwargs)
+                parser.parse_html = record_thread
+                async for word, result in parser.iter_fetch(words()):
+                    seen.append(len(consumed))
+            return seen, parse_threads
+
+        seen, parse_threads = self.loop.run_until_complete(self.run_server(iter_fetch))
+
+        self.assertEqual(len(seen), 20)
+        self.assertLessEqual(seen[0], 4)
+        self.assertNotIn(threading.get_ident(), parse_threads)
+
+    def test_requests_per_host_are_rate_limited(self):
+        async def fetch_many(url):
+            async with AsyncWiktionaryParser(requests_per_second=50) as parser:
+                parser.url = url
+                start = self.loop.time()
+                await parser.fetch_many([f'word{i}' for i in range(6)])
+                return self.loop.time() - start
+
+        elapsed = self.loop.run_until_complete(self.run_server(fetch_many))
+
+        self.assertGreaterEqual(elapsed, 0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
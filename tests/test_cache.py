@@ -0,0 +1,105 @@
+import os
+import tempfile
+import unittest
+import mock
+import requests
+from bs4 import BeautifulSoup
+from wiktionaryparser import WiktionaryParser, MemoryCache, SQLiteCache
+from wiktionaryparser.cache import BaseCache
+from tests.test_core import MockResponse
+
+
+class TestMemoryCache(unittest.TestCase):
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = MemoryCache(max_size=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual(cache.stats(), {'hits': 3, 'misses': 1, 'size': 2})
+
+    @mock.patch('time.time')
+    def test_ttl_only_applies_to_expiring_entries(self, mock_time):
+        mock_time.return_value = 1000
+        cache = MemoryCache(ttl=60)
+        cache.set('unpinned', 'old')
+        cache.set('pinned', 'page', expires=False)
+
+        mock_time.return_value = 1061
+
+        self.assertIsNone(cache.get('unpinned'))
+        self.assertEqual(cache.get('pinned'), 'page')
+
+
+class TestSQLiteCache(unittest.TestCase):
+    def test_entries_persist_across_instances(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cache.sqlite')
+            cache = SQLiteCache(path)
+            cache.set(('en', 'cat', 60300266), '<html>cat</html>', expires=False)
+            cache.close()
+
+            cache = SQLiteCache(path)
+            self.assertEqual(cache.get(('en', 'cat', 60300266)), '<html>cat</html>')
+            self.assertIsNone(cache.get(('en', 'cat', None)))
+            self.assertEqual(cache.stats(), {'hits': 1, 'misses': 1, 'size': 1})
+            cache.close()
+
+
+class TestParserCache(unittest.TestCase):
+    @mock.patch('requests.Session.get', return_value=MockResponse('<html><body><h2>French</h2></body></html>'))
+    def test_repeated_fetch_is_served_from_cache(self, mock_get):
+        parser = WiktionaryParser(cache=MemoryCache())
+
+        first = parser.fetch('chat', old_id=1)
+        second = parser.fetch('chat', old_id=1)
+        parser.fetch('chat', old_id=2)
+
+        self.assertEqual(first, second)
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(parser.cache.hits, 1)
+
+    @mock.patch('requests.Session.get')
+    def test_error_pages_are_not_cached(self, mock_get):
+        parser = WiktionaryParser(cache=MemoryCache())
+        mock_get.return_value = MockResponse('<html><body>Service unavailable</body></html>', 503)
+
+        with self.assertRaises(requests.HTTPError):
+            parser.fetch('chat', old_id=5)
+        self.assertEqual(len(parser.cache), 0)
+
+        mock_get.return_value = MockResponse('<html><body><h2>French</h2></body></html>')
+        self.assertEqual(parser.fetch('chat', old_id=5), {'languages': ['French'], 'disambig': []})
+        self.assertEqual(mock_get.call_count, 2)
+
+    def test_caches_must_implement_storage(self):
+        class IncompleteCache(BaseCache):
+            def _get(self, key, now):
+                return None
+
+        with self.assertRaises(TypeError):
+            IncompleteCache()
+
+    def test_parsed_results_are_reused_until_configuration_changes(self):
+        html = '<html><body><h2>French</h2></body></html>'
+        parser = WiktionaryParser(result_cache=MemoryCache())
+
+        with mock.patch('wiktionaryparser.core.BeautifulSoup', wraps=BeautifulSoup) as mock_soup:
+            first = parser.parse_html(html, 'chat')
+            second = parser.parse_html(html, 'chat')
+            self.assertEqual(mock_soup.call_count, 1)
+
+            parser.exclude_relation('synonyms')
+            parser.parse_html(html, 'chat')
+            self.assertEqual(mock_soup.call_count, 2)
+
+        self.assertEqual(first, second)
+        self.assertIsNot(first, second)
+
+
+if __name__ == '__main__':
+    unittest.main()
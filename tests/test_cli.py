@@ -0,0 +1,66 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+import mock
+from wiktionaryparser.cli import main, read_words
+from tests.test_core import MockResponse, sample_html
+
+
+def mocked_get(url, *args, **kwargs):
+    if '/broken' in url:
+        raise ConnectionError('connection reset')
+    return MockResponse(sample_html)
+
+
+class TestCli(unittest.TestCase):
+    def test_read_words_with_optional_old_ids(self):
+        lines = ['cat\n', '\n', 'dog\t60355953\n', 'trip up\r\n']
+
+        self.assertEqual(list(read_words(lines, 5)), [('cat', 5), ('dog', 60355953), ('trip up', 5)])
+
+    def test_malformed_old_ids_are_reported_per_line(self):
+        errors = []
+        words = list(read_words(['cat\tabc\n', 'dog\n'], on_error=lambda word, error: errors.append((word, error))))
+
+        self.assertEqual(words, [('dog', None)])
+        self.assertEqual(errors[0][0], 'cat')
+        self.assertIn("line 1: invalid oldid 'abc'", str(errors[0][1]))
+        with self.assertRaises(ValueError):
+            list(read_words(['cat\tabc\n']))
+
+    def test_revalidate_needs_a_cache_dir(self):
+        with mock.patch('sys.stderr', new_callable=io.StringIO) as stderr:
+            with self.assertRaises(SystemExit):
+                main(['--revalidate'])
+
+        self.assertIn('--revalidate needs --cache-dir', stderr.getvalue())
+
+    @mock.patch('requests.Session.get', side_effect=mocked_get)
+    def test_words_are_written_as_json_lines(self, mock_get):
+        with tempfile.TemporaryDirectory() as directory:
+            input_path = os.path.join(directory, 'words.txt')
+            output_path = os.path.join(directory, 'words.jsonl')
+            with open(input_path, 'w', encoding='utf-8') as f:
+                f.write('test\t60380981\nbroken\nmalformed\tabc\ntest\t60380981\n')
+
+            with mock.patch('sys.stderr', new_callable=io.StringIO) as stderr:
+                status = main([input_path, '-o', output_path, '--pack', '-j', '1',
+                               '--cache-dir', os.path.join(directory, 'cache')])
+
+            with open(output_path, encoding='utf-8') as f:
+                records = [json.loads(line) for line in f]
+
+        self.assertEqual(status, 1)
+        self.assertEqual(mock_get.call_count, 2)
+        records = {record['word']: record for record in records}
+        self.assertEqual(records['test']['result'][0][0]['part_of_speech'], 'noun')
+        self.assertIn('error', records['broken'])
+        self.assertIn('invalid oldid', records['malformed']['error'])
+        self.assertIn('4 words (2 failed)', stderr.getvalue())
+        self.assertIn('cache hits: 1', stderr.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
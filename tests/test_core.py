@@ -3,10 +3,17 @@ import unittest
 import json
 from wiktionaryparser import WiktionaryParser
 from deepdiff import DeepDiff
+from bs4 import BeautifulSoup
 from typing import Dict, List
 import mock
+import requests
 from urllib import parse
+from concurrent.futures import ThreadPoolExecutor
+import io
 import os
+import re
+import subprocess
+import sys
 
 parser = WiktionaryParser()
 
@@ -80,6 +87,69 @@ test_words = [
     ('disciplină', 871618, 'ro')
 ]
 
+# A small page in the current MediaWiki heading markup, for tests that need a
+# parseable page without the network.
+sample_html = (
+    '<html><body><div class="mw-parser-output">'
+    '<div class="disambig-see-also">See also: Tést</div>\n'
+    '<div class="mw-heading mw-heading2"><h2 id="English">English</h2></div>\n'
+    '<div class="mw-heading mw-heading3"><h3 id="Etymology">Etymology</h3></div>\n'
+    '<p>From Middle English <i>test</i>.<sup class="reference">[1]</sup></p>\n'
+    '<div class="mw-heading mw-heading3"><h3 id="Pronunciation">Pronunciation</h3></div>\n'
+    '<ul><li>IPA: /tɛst/</li><li><span></span></li></ul>\n'
+    '<div class="mw-heading mw-heading3"><h3 id="Noun">Noun</h3></div>\n'
+    '<p><b>test</b> (plural tests)</p>\n'
+    '<ol><li>A challenge.<dl><dd>The test was hard.</dd></dl></li>'
+    '<li>A cupel.<ol><li>A refining pot.</li></ol></li></ol>\n'
+    '<div class="mw-heading mw-heading4"><h4 id="Synonyms">Synonyms</h4></div>\n'
+    '<ul><li>exam</li><li>trial</li></ul>\n'
+    '<div class="mw-heading mw-heading3"><h3 id="Verb">Verb</h3></div>\n'
+    '<ol><li>To challenge.</li></ol>\n'
+    '<div class="mw-heading mw-heading2"><h2 id="French">French</h2></div>\n'
+    '<div class="mw-heading mw-heading3"><h3 id="Noun_2">Noun</h3></div>\n'
+    '<ol><li>test (examination)</li></ol>\n'
+    '</div></body></html>'
+)
+
+
+sample_toc = (
+    '<div id="toc" class="toc"><ul>'
+    '<li><a href="#English"><span class="tocnumber">1</span> <span class="toctext">English</span></a><ul>'
+    '<li><a href="#Etymology"><span class="tocnumber">1.1</span> <span class="toctext">Etymology</span></a></li>'
+    '<li><a href="#Pronunciation"><span class="tocnumber">1.2</span> <span class="toctext">Pronunciation</span></a></li>'
+    '<li><a href="#Noun"><span class="tocnumber">1.3</span> <span class="toctext">Noun</span></a><ul>'
+    '<li><a href="#Synonyms"><span class="tocnumber">1.3.1</span> <span class="toctext">Synonyms</span></a></li></ul></li>'
+    '<li><a href="#Verb"><span class="tocnumber">1.4</span> <span class="toctext">Verb</span></a></li></ul></li>'
+    '<li><a href="#French"><span class="tocnumber">2</span> <span class="toctext">French</span></a><ul>'
+    '<li><a href="#Noun_2"><span class="tocnumber">2.1</span> <span class="toctext">Noun</span></a></li></ul></li>'
+    '</ul></div>'
+)
+sample_html_with_toc = sample_html.replace('<div class="disambig-see-also">', sample_toc + '<div class="disambig-see-also">')
+
+
+def reference_clean_html(soup):
+    """The original whole-page clean_html, kept to check the current one against."""
+    unwanted_classes = ['sister-wikipedia', 'thumb', 'reference', 'cited-source']
+    for tag in soup.find_all(True, {'class': unwanted_classes}):
+        tag.extract()
+    [x.decompose() for x in soup.find_all(
+        lambda tag: (not tag.contents or len(tag.get_text(strip=True)) <= 0) and not tag.name == 'br')]
+
+
+# The test pages were saved before Wiktionary moved heading ids from
+# <span class="mw-headline"> onto the heading itself, wrapped in a
+# <div class="mw-heading">. Rewriting them to the current markup lets every
+# parsing stage run on them. Headings may start with empty anchor spans and end
+# with an edit section link, and headlines may hold nested tags.
+LEGACY_HEADING_RE = re.compile(
+    r'<h([2-5])>(?:<span id="[^"]*"></span>)*<span class="mw-headline" id="([^"]*)">((?:(?!</h\1>).)*?)</span>'
+    r'(?:<span class="mw-editsection">(?:(?!</h\1>).)*?</span></span>)?</h\1>', re.S)
+
+
+def modernize_headings(html):
+    return LEGACY_HEADING_RE.sub(
+        lambda m: f'<div class="mw-heading mw-heading{m.group(1)}"><h{m.group(1)} id="{m.group(2)}">{m.group(3)}</h{m.group(1)}></div>',
+        html)
 
 def get_test_words_table(*allowed_words):
     """Convert the test_words array to an array of three element tuples."""
@@ -93,8 +163,26 @@ def get_test_words_table(*allowed_words):
 
 
 class MockResponse:
-    def __init__(self, text: str):
+    def __init__(self, text: str, status_code: int = 200):
         self.text = text
+        self.encoding = 'utf-8'
+        self.status_code = status_code
+        self.headers = {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f'{self.status_code} Error', response=self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def iter_content(self, chunk_size=1):
+        content = self.text.encode('utf-8')
+        for start in range(0, len(content), chunk_size):
+            yield content[start:start + chunk_size]
 
 
 def mocked_requests_get(*args, **kwargs):
@@ -115,6 +203,7 @@ class TestParser(unittest.TestCase):
     def __init__(self, *args, **kwargs):
         self.expected_fetch_results = {}
         self.expected_pack_results = {}
+        self.expected_parse_html_results = {}
 
         with open('tests/test_fetch_output.json', 'r') as f:
             self.expected_fetch_results = json.load(f)
@@ -122,6 +211,9 @@ class TestParser(unittest.TestCase):
         with open('tests/test_pack_output.json', 'r') as f:
             self.expected_pack_results = json.load(f)
 
+        with open('tests/test_parse_html_output.json', 'r') as f:
+            self.expected_parse_html_results = json.load(f)
+
         super(TestParser, self).__init__(*args, **kwargs)
 
     @parameterized.expand(get_test_words_table())
@@ -129,6 +221,22 @@ class TestParser(unittest.TestCase):
     def test_using_mock_session(self, lang: str, word: str, old_id: int, mock_get):
         self.__test(lang, word, old_id)
 
+    @parameterized.expand(get_test_words_table())
+    def test_parse_html(self, lang: str, word: str, old_id: int):
+        # test_fetch_output.json was recorded from the legacy markup. These
+        # outputs were recorded with the original parser, before parse_html
+        # existed, from the same pages rewritten to the current markup.
+        filepath = os.path.join(html_test_files_dir, f'{lang}-{word}-{old_id}.html')
+        with open(filepath, 'r', encoding='utf-8') as f:
+            html = modernize_headings(f.read())
+        sample_parser = WiktionaryParser()
+        sample_parser.set_language(lang)
+
+        result = sample_parser.parse_html(io.BytesIO(html.encode('utf-8')), word)
+
+        self.assertTrue(any(entry['definitions'] for entry in result))
+        self.assertEqual(result, self.expected_parse_html_results[lang][word])
+
     def __test(self, lang: str, word: str, old_id: int):
         parser.set_language(lang)
 
@@ -149,6 +257,235 @@ class TestParser(unittest.TestCase):
         self.assertEqual(diff_fetched, {})
         self.assertEqual(diff_packed, {})
 
+    @mock.patch("requests.Session.get")
+    def test_fetch_many_reports_failures_per_word(self, mock_get):
+        def get(url, *args, **kwargs):
+            if url.endswith('/broken?useskin=vector'):
+                raise ConnectionError('connection reset')
+            if url.endswith('/unavailable?useskin=vector'):
+                return MockResponse('<html><body>Service unavailable</body></html>', 503)
+            return MockResponse('<html><body><h2>French</h2></body></html>')
+        mock_get.side_effect = get
+
+        results = WiktionaryParser().fetch_many(['chat', 'broken', 'unavailable', 'chien'], max_workers=2)
+
+        self.assertEqual(results['chat'], {'languages': ['French'], 'disambig': []})
+        self.assertEqual(results['chien'], {'languages': ['French'], 'disambig': []})
+        self.assertIsInstance(results['broken'], ConnectionError)
+        self.assertIsInstance(results['unavailable'], requests.HTTPError)
+        self.assertEqual(results['unavailable'].response.status_code, 503)
+
+    def test_backends_give_identical_results(self):
+        expected = WiktionaryParser().parse_html(sample_html, 'test')
+
+        self.assertEqual(WiktionaryParser(backend='lxml').parse_html(sample_html, 'test'), expected)
+        self.assertEqual(expected[0]['definitions'][0]['text'][1], 'A challenge.')
+
+    @parameterized.expand(get_test_words_table())
+    def test_backends_give_identical_results_on_test_pages(self, lang: str, word: str, old_id: int):
+        with open(os.path.join(html_test_files_dir, f'{lang}-{word}-{old_id}.html'), 'r', encoding='utf-8') as f:
+            html = modernize_headings(f.read())
+        results = []
+        for backend in ['html.parser', 'lxml']:
+            sample_parser = WiktionaryParser(backend=backend)
+            sample_parser.set_language(lang)
+            results.append(sample_parser.parse_html(html, word))
+
+        self.assertEqual(results[1], results[0])
+
+    def test_section_ids_are_collected_once_per_page(self):
+        sample_parser = WiktionaryParser()
+        with mock.patch.object(sample_parser, 'build_id_list', wraps=sample_parser.build_id_list) as mock_build:
+            sample_parser.parse_html(sample_html, 'test')
+
+        content_types = sorted(call.args[1] for call in mock_build.call_args_list)
+        self.assertEqual(content_types, ['definitions', 'etymologies', 'pronunciation', 'related'])
+
+    @parameterized.expand([('en-a-60361249.html',), ('en-pregnant-60421274.html',), ('ro-cuvânt-946663.html',)])
+    def test_clean_html_matches_reference(self, filename: str):
+        with open(os.path.join(html_test_files_dir, filename), 'r', encoding='utf-8') as f:
+            html = f.read().replace('>\n<', '><')
+        expected = BeautifulSoup(html, 'html.parser')
+        reference_clean_html(expected)
+
+        parser.soup = BeautifulSoup(html, 'html.parser')
+        parser.clean_html()
+
+        self.assertEqual(str(parser.soup), str(expected))
+
+    def test_clean_html_only_prunes_the_requested_language(self):
+        html = sample_html_with_toc.replace('</div></body>', '<p class="french-note"></p></div></body>')
+        sample_parser = WiktionaryParser()
+        sample_parser.soup = BeautifulSoup(html, 'html.parser')
+        sample_parser.clean_html()
+        expected = sample_parser.get_word_data('english')
+        self.assertIsNone(sample_parser.soup.find('p', {'class': 'french-note'}))
+
+        sample_parser.soup = BeautifulSoup(html, 'html.parser')
+        sample_parser.clean_html('english')
+
+        self.assertIsNotNone(sample_parser.soup.find('p', {'class': 'french-note'}))
+        self.assertIsNone(sample_parser.soup.find('sup'))
+        self.assertEqual(sample_parser.get_word_data('english'), expected)
+
+    def test_only_the_requested_language_is_parsed(self):
+        sample_parser = WiktionaryParser()
+        with mock.patch('wiktionaryparser.core.slice_language_sections', return_value=None):
+            expected = sample_parser.parse_html(sample_html_with_toc, 'test')
+            expected_no_entry = sample_parser.parse_html(sample_html_with_toc, 'test', 'german')
+
+        self.assertEqual(sample_parser.parse_html(sample_html_with_toc, 'test'), expected)
+        self.assertIsNone(sample_parser.soup.find('h3', {'id': 'Noun_2'}))
+        self.assertEqual(sample_parser.parse_html(sample_html_with_toc, 'test', 'german'), expected_no_entry)
+        self.assertEqual(expected_no_entry, {'languages': ['English', 'French'], 'disambig': ['Tést']})
+
+    def test_many_languages_are_parsed_from_one_tree(self):
+        sample_parser = WiktionaryParser()
+        expected = {
+            'en': sample_parser.parse_html(sample_html_with_toc, 'test', 'english'),
+            'French': sample_parser.parse_html(sample_html_with_toc, 'test', 'french'),
+            'german': sample_parser.parse_html(sample_html_with_toc, 'test', 'german'),
+        }
+
+        with mock.patch('wiktionaryparser.core.BeautifulSoup', wraps=BeautifulSoup) as mock_soup:
+            results = sample_parser.parse_html(sample_html_with_toc, 'test', languages=['en', 'French'])
+            self.assertEqual(mock_soup.call_count, 1)
+            results.update(sample_parser.parse_html(sample_html_with_toc, 'test', languages=['german']))
+
+        self.assertEqual(results, expected)
+        self.assertEqual(results['French'][0]['definitions'][0]['text'], ['test (examination)'])
+
+    def test_only_the_edition_language_can_be_given_by_code(self):
+        sample_parser = WiktionaryParser()
+        with self.assertRaises(ValueError):
+            sample_parser.parse_html(sample_html_with_toc, 'test', languages=['ro'])
+
+        sample_parser.set_language('ro')
+        self.assertEqual(sample_parser.resolve_language('ro'), 'română')
+        with self.assertRaises(ValueError):
+            sample_parser.resolve_language('en')
+
+    def test_one_parser_can_be_shared_between_threads(self):
+        pages = [(sample_html_with_toc, 'english'), (sample_html, 'french'), (sample_html_with_toc, 'german')] * 10
+        expected = [WiktionaryParser().parse_html(html, 'test', language) for html, language in pages]
+
+        shared_parser = WiktionaryParser()
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda page: shared_parser.parse_html(page[0], 'test', page[1]), pages))
+
+        self.assertEqual(results, expected)
+
+    def test_chinese_lookups_leave_parts_of_speech_untouched(self):
+        sample_parser = WiktionaryParser()
+        sample_parser.language = 'chinese'
+        sample_parser.parse_html(sample_html, '测试', 'english')
+
+        self.assertEqual(sample_parser.PARTS_OF_SPEECH, WiktionaryParser().PARTS_OF_SPEECH)
+
+    def test_import_leaves_slow_optional_modules_unloaded(self):
+        slow_modules = {'asyncio', 'aiohttp'}
+        if sys.version_info >= (3, 7):
+            # Before 3.7, concurrent.futures imports multiprocessing itself.
+            slow_modules.add('multiprocessing')
+        if sys.version_info >= (3, 8):
+            # Before 3.8, the version is looked up with pkg_resources.
+            slow_modules.add('pkg_resources')
+        code = ("import sys, wiktionaryparser\n"
+                "wiktionaryparser.WiktionaryParser().get_user_agent()\n"
+                f"print(sorted(set(sys.modules) & {slow_modules!r}))")
+        output = subprocess.run([sys.executable, '-c', code], stdout=subprocess.PIPE, universal_newlines=True,
+                                check=True).stdout
+        self.assertEqual(output.strip(), '[]')
+
+    def test_pack_many_matches_packing_each_word(self):
+        for lang, words in self.expected_fetch_results.items():
+            self.assertEqual(WiktionaryParser.pack_many(words), self.expected_pack_results[lang])
+        error = ValueError('no such page')
+        self.assertEqual(WiktionaryParser.pack_many([error, {'languages': [], 'disambig': []}]),
+                         [error, {'languages': [], 'disambig': []}])
+
+    def test_pack_handles_deeply_nested_definitions(self):
+        definitions = ['leaf']
+        for _ in range(5000):
+            definitions = [definitions]
+        word = [{'definitions': [{'partOfSpeech': 'noun', 'text': ['top'] + definitions,
+                                  'examples': [{'index': 1, 'text': 'an example'}]}]}]
+        packed = WiktionaryParser.pack_definitions_and_examples(word)
+        nested = packed[0][0]['text'][1]
+        for _ in range(4999):
+            nested = nested[0]
+        self.assertEqual(nested, [{'text': 'leaf', 'examples': ['an example']}])
+
+    def test_packing_from_threads_is_consistent(self):
+        words = [word for words in self.expected_fetch_results.values() for word in words.values()]
+        expected = [WiktionaryParser.pack_definitions_and_examples(word) for word in words]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            self.assertEqual(list(executor.map(WiktionaryParser.pack_definitions_and_examples, words * 4)),
+                             expected * 4)
+
+    def test_map_to_object_joins_sections_by_index(self):
+        word_data = {
+            'etymologies': [('1', 'First'), ('2', 'Second')],
+            'pronunciations': [('1.1', ['/a/'], ['a.ogg'])],
+            'definitions': [('1.2', ['one'], 'noun'), ('2.1', ['two'], 'verb'), ('1.10', ['ten'], 'noun')],
+            'examples': [('1.2', [{'index': 0, 'text': 'an example'}], 'noun')],
+            'related': [('1.2.1', ['uno'], 'synonyms'), ('1.10.1', ['diez'], 'synonyms')],
+        }
+        self.assertEqual(WiktionaryParser().map_to_object(word_data), [
+            {'etymology': 'First',
+             'definitions': [
+                 {'partOfSpeech': 'noun', 'text': ['one'], 'examples': [{'index': 0, 'text': 'an example'}],
+                  'relatedWords': [{'relationshipType': 'synonyms', 'words': ['uno']}]},
+                 {'partOfSpeech': 'noun', 'text': ['ten'], 'examples': [],
+                  'relatedWords': [{'relationshipType': 'synonyms', 'words': ['diez']}]}],
+             'pronunciations': {'text': ['/a/'], 'audio': ['a.ogg']}},
+            {'etymology': 'Second',
+             'definitions': [{'partOfSpeech': 'verb', 'text': ['two'], 'examples': [], 'relatedWords': []}],
+             'pronunciations': {'text': [], 'audio': []}},
+        ])
+
+    def test_section_names_are_rebuilt_only_when_configuration_changes(self):
+        def parts_of_speech(result):
+            return [definition['partOfSpeech'] for entry in result for definition in entry['definitions']]
+
+        sample_parser = WiktionaryParser()
+        self.assertEqual(parts_of_speech(sample_parser.parse_html(sample_html, 'test')), ['noun', 'verb'])
+        with mock.patch.object(sample_parser, 'translate', wraps=sample_parser.translate) as translate:
+            sample_parser.parse_html(sample_html, 'test')
+            translate.assert_not_called()
+        sample_parser.exclude_part_of_speech('verb')
+        self.assertEqual(parts_of_speech(sample_parser.parse_html(sample_html, 'test')), ['noun'])
+        sample_parser.include_part_of_speech('verb')
+        self.assertEqual(parts_of_speech(sample_parser.parse_html(sample_html, 'test')), ['noun', 'verb'])
+
+    def test_lazy_results_only_parse_the_sections_read(self):
+        sample_parser = WiktionaryParser()
+        expected = sample_parser.parse_html(sample_html, 'test')
+        with mock.patch.object(sample_parser, 'parse_definitions', wraps=sample_parser.parse_definitions) as parse:
+            result = sample_parser.parse_html(sample_html, 'test', lazy=True)
+            self.assertEqual([entry['pronunciations'] for entry in result],
+                             [entry['pronunciations'] for entry in expected])
+            parse.assert_not_called()
+            self.assertEqual(result, expected)
+            parse.assert_called_once()
+
+    def test_fields_skip_unneeded_parsers(self):
+        sample_parser = WiktionaryParser()
+        expected = sample_parser.parse_html(sample_html, 'test')
+        with mock.patch.object(sample_parser, 'parse_examples') as parse_examples:
+            result = sample_parser.parse_html(sample_html, 'test', fields=['pronunciations'])
+            parse_examples.assert_not_called()
+        self.assertEqual([entry['pronunciations'] for entry in result],
+                         [entry['pronunciations'] for entry in expected])
+        self.assertEqual([entry['definitions'] for entry in result], [[]] * len(expected))
+        self.assertEqual([entry['etymology'] for entry in result], [''] * len(expected))
+
+        result = sample_parser.parse_html(sample_html, 'test', fields=['definitions', 'examples', 'related'])
+        self.assertEqual([entry['definitions'] for entry in result],
+                         [entry['definitions'] for entry in expected])
+        with self.assertRaises(ValueError):
+            sample_parser.parse_html(sample_html, 'test', fields=['audio'])
+
     @staticmethod
     def alert_diff(diff: DeepDiff, word: str, lang: str, actual_result):
         print(f"Found mismatch in '{word}' in '{lang}'")
@@ -0,0 +1,50 @@
+import asyncio
+import unittest
+from wiktionaryparser import WiktionaryParser, AsyncWiktionaryParser
+from wiktionaryparser.core import HTMLStreamDecoder
+from tests.test_core import sample_html
+from tests.test_revalidation import StandInWiki, make_page
+
+
+class TestHTMLStreamDecoder(unittest.TestCase):
+    def test_chunks_decode_like_the_whole_page(self):
+        html = sample_html + '<p>ăîșț>\n>\n<</p>\n<br>\n'
+        content = html.encode('utf-8')
+        for chunk_size in range(1, 8):
+            decoder = HTMLStreamDecoder()
+            for start in range(0, len(content), chunk_size):
+                decoder.feed(content[start:start + chunk_size])
+            self.assertEqual(decoder.close(), html.replace('>\n<', '><'))
+
+
+class TestStreamingDownload(unittest.TestCase):
+    def setUp(self):
+        self.wiki = StandInWiki()
+        self.wiki.compress = True
+        self.expected = make_page(1, 'A challenge.', 1).replace('>\n<', '><')
+
+    def tearDown(self):
+        self.wiki.close()
+
+    def test_compressed_pages_are_streamed(self):
+        parser = WiktionaryParser()
+        parser.url = self.wiki.url
+        self.assertEqual(parser.download('test'), self.expected)
+        self.assertIn('gzip', self.wiki.requests[0].get('Accept-Encoding'))
+
+    def test_async_parser_streams_compressed_pages(self):
+        async def download():
+            async with AsyncWiktionaryParser() as parser:
+                parser.url = self.wiki.url
+                return await parser.download('test')
+
+        loop = asyncio.new_event_loop()
+        try:
+            self.assertEqual(loop.run_until_complete(download()), self.expected)
+        finally:
+            loop.close()
+        self.assertIn('gzip', self.wiki.requests[0].get('Accept-Encoding'))
+
+
+if __name__ == '__main__':
+    unittest.main()
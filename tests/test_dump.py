@@ -0,0 +1,61 @@
+import bz2
+import io
+import json
+import os
+import tempfile
+import unittest
+from wiktionaryparser.dump import iter_dump_pages, parse_dump
+from tests.test_core import sample_html
+
+dump_xml = '''<mediawiki xmlns="http://www.mediawiki.org/xml/export-0.10/" version="0.10">
+  <siteinfo><sitename>Wiktionary</sitename></siteinfo>
+  <page>
+    <title>test</title><ns>0</ns><id>10</id>
+    <revision><id>60380981</id><parentid>1</parentid><text xml:space="preserve">==English==</text></revision>
+  </page>
+  <page>
+    <title>Wiktionary:Main Page</title><ns>4</ns><id>11</id>
+    <revision><id>12</id><text xml:space="preserve">Welcome</text></revision>
+  </page>
+  <page>
+    <title>tests</title><ns>0</ns><id>13</id><redirect title="test" />
+    <revision><id>14</id><text xml:space="preserve">#REDIRECT [[test]]</text></revision>
+  </page>
+  <page>
+    <title>broken</title><ns>0</ns><id>15</id>
+    <revision><id>16</id><text xml:space="preserve">==French==</text></revision>
+  </page>
+</mediawiki>'''
+
+
+class TestDump(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.dump_path = os.path.join(self.directory.name, 'enwiktionary-pages-articles.xml.bz2')
+        with bz2.open(self.dump_path, 'wt', encoding='utf-8') as f:
+            f.write(dump_xml)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_iter_dump_pages_skips_redirects_and_other_namespaces(self):
+        pages = list(iter_dump_pages(self.dump_path))
+
+        self.assertEqual(pages, [('test', 60380981, '==English=='), ('broken', 16, '==French==')])
+
+    def test_parse_dump_writes_one_record_per_page(self):
+        def render(title, wikitext):
+            return sample_html if title == 'test' else None
+
+        output = io.StringIO()
+        count = parse_dump(self.dump_path, output, render)
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+
+        self.assertEqual(count, 1)
+        self.assertEqual(records[0]['word'], 'test')
+        self.assertEqual(records[0]['oldid'], 60380981)
+        self.assertEqual(records[0]['result'][0]['definitions'][0]['partOfSpeech'], 'noun')
+
+
+if __name__ == '__main__':
+    unittest.main()
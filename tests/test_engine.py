@@ -0,0 +1,33 @@
+import unittest
+from wiktionaryparser import WiktionaryParser
+from wiktionaryparser.engine import ParserPool
+from tests.test_core import sample_html
+
+no_entry_html = '<html><body><h2>French</h2></body></html>'
+
+
+class TestParserPool(unittest.TestCase):
+    def setUp(self):
+        self.items = [('test', sample_html), ('chat', no_entry_html), ('chien', no_entry_html)] * 4
+        self.expected = WiktionaryParser().parse_html(sample_html, 'test')
+
+    def test_results_keep_input_order(self):
+        with ParserPool(processes=2, max_in_flight=3) as pool:
+            results = list(pool.imap(self.items))
+
+        self.assertEqual([word for word, _ in results], [word for word, _ in self.items])
+        self.assertEqual(results[0][1], self.expected)
+        self.assertEqual(results[1][1], {'languages': ['French'], 'disambig': []})
+
+    def test_unordered_results_and_failures(self):
+        items = self.items + [('broken', None)]
+        with ParserPool(processes=2, backend='lxml') as pool:
+            results = list(pool.imap(items, ordered=False))
+
+        self.assertEqual(sorted(word for word, _ in results), sorted(word for word, _ in items))
+        self.assertIn(('test', self.expected), results)
+        self.assertIsInstance(dict(results)['broken'], Exception)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+import mock
+from wiktionaryparser import WiktionaryParser, ParserMetrics
+from tests.test_core import MockResponse, sample_html
+
+PARSE_STAGES = ['parse_html', 'slice', 'soup', 'clean', 'parse_examples', 'parse_definitions',
+                'parse_etymologies', 'parse_related_words', 'parse_pronunciations', 'serialize']
+
+
+class TestParserMetrics(unittest.TestCase):
+    @mock.patch('requests.Session.get', return_value=MockResponse(sample_html))
+    def test_stages_are_recorded_per_call_and_in_total(self, mock_get):
+        calls = []
+        metrics = ParserMetrics(callback=calls.append)
+        parser = WiktionaryParser(metrics=metrics)
+
+        parser.fetch('test')
+        parser.parse_html(sample_html, 'test')
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(sorted(calls[0]), sorted(['fetch', 'http'] + PARSE_STAGES))
+        self.assertEqual(sorted(calls[1]), sorted(PARSE_STAGES))
+        self.assertEqual(metrics.last_call(), calls[1])
+
+        totals = metrics.as_dict()
+        self.assertEqual(totals['calls'], 2)
+        self.assertEqual(totals['stages']['soup']['count'], 2)
+        self.assertEqual(totals['stages']['http']['count'], 1)
+        self.assertGreater(totals['stages']['fetch']['seconds'], totals['stages']['http']['seconds'])
+
+        metrics.reset()
+        self.assertEqual(metrics.as_dict(), {'calls': 0, 'stages': {}})
+
+
+if __name__ == '__main__':
+    unittest.main()
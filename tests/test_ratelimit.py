@@ -0,0 +1,183 @@
+import asyncio
+import os
+import pickle
+import tempfile
+import threading
+import time
+import unittest
+from urllib.parse import urlsplit
+from http.server import BaseHTTPRequestHandler
+import aiohttp
+import requests
+from wiktionaryparser import WiktionaryParser, AsyncWiktionaryParser, MemoryCache, RateLimiter
+from wiktionaryparser.ratelimit import parse_retry_after
+from tests.test_revalidation import ThreadingHTTPServer, make_page
+
+
+class ThrottlingWiki(object):
+    """A local stand-in for Wiktionary answering 429 to the first `throttle` requests."""
+
+    def __init__(self, throttle, retry_after='0'):
+        self.throttle = throttle
+        self.requests = 0
+        wiki = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                wiki.requests += 1
+                if wiki.requests <= wiki.throttle:
+                    self.send_response(429)
+                    if retry_after is not None:
+                        self.send_header('Retry-After', retry_after)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                body = make_page(1, 'A challenge.').encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/wiki/{{}}'
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_requests_are_paced_per_host(self):
+        limiter = RateLimiter(requests_per_second=50, burst=1, per_host={'fast.example': 1000})
+        start = time.perf_counter()
+        for _ in range(6):
+            limiter.acquire('en.wiktionary.org')
+        self.assertGreaterEqual(time.perf_counter() - start, 0.09)
+        self.assertEqual(limiter.reserve('fast.example'), 0)
+        self.assertEqual(limiter.stats()['requests'], 7)
+        self.assertGreater(limiter.stats()['waits'], 0)
+
+    def test_throttling_pauses_the_host(self):
+        limiter = RateLimiter(requests_per_second=1000, backoff_base=10)
+        self.assertEqual(limiter.throttle('en.wiktionary.org', '30'), 30)
+        self.assertGreater(limiter.reserve('en.wiktionary.org'), 29)
+        self.assertEqual(limiter.reserve('ro.wiktionary.org'), 0)
+        self.assertLessEqual(limiter.throttle('ro.wiktionary.org', None, attempt=2), 40)
+        self.assertEqual(limiter.stats()['throttled'], 2)
+
+    def test_retry_after_accepts_seconds_and_dates(self):
+        self.assertEqual(parse_retry_after('120'), 120)
+        self.assertEqual(parse_retry_after('Sat, 17 Oct 2026 00:01:00 GMT', now=1792195200), 60)
+        self.assertIsNone(parse_retry_after('soon'))
+        self.assertIsNone(parse_retry_after(None))
+
+    def test_buckets_in_a_file_are_shared_between_processes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            limiter = RateLimiter(requests_per_second=0.01, burst=1, path=os.path.join(directory, 'limits.sqlite'))
+            copy = pickle.loads(pickle.dumps(limiter))
+            self.assertEqual(limiter.reserve('en.wiktionary.org'), 0)
+            self.assertGreater(copy.reserve('en.wiktionary.org'), 0)
+            limiter.close()
+            copy.close()
+        with self.assertRaises(TypeError):
+            pickle.dumps(RateLimiter())
+
+
+class TestThrottledDownloads(unittest.TestCase):
+    def test_throttled_requests_are_retried(self):
+        wiki = ThrottlingWiki(throttle=2)
+        try:
+            limiter = RateLimiter(requests_per_second=100)
+            parser = WiktionaryParser(rate_limiter=limiter)
+            parser.url = wiki.url
+            result = parser.fetch('test')
+        finally:
+            wiki.close()
+        self.assertEqual(result[0]['definitions'][0]['text'], ['A challenge.'])
+        self.assertEqual(wiki.requests, 3)
+        self.assertEqual(limiter.stats()['throttled'], 2)
+        self.assertEqual(limiter.stats()['retries'], 2)
+
+    def test_retries_stop_after_max_retries(self):
+        wiki = ThrottlingWiki(throttle=10, retry_after=None)
+        try:
+            limiter = RateLimiter(max_retries=1, backoff_base=0.01)
+            parser = WiktionaryParser(cache=MemoryCache(), rate_limiter=limiter)
+            parser.url = wiki.url
+            with self.assertRaises(requests.HTTPError) as raised:
+                parser.request_page(wiki.url.format('test'))
+            self.assertEqual(raised.exception.response.status_code, 429)
+            self.assertEqual(limiter.stats()['throttled'], 2)
+            self.assertEqual(limiter.stats()['retries'], 1)
+            self.assertGreater(limiter.reserve(urlsplit(wiki.url).netloc), 0)
+            self.assertIsInstance(parser.fetch_many(['test'])['test'], requests.HTTPError)
+        finally:
+            wiki.close()
+        self.assertEqual(wiki.requests, 4)
+        self.assertEqual(len(parser.cache), 0)
+
+    def test_async_retries_stop_after_max_retries(self):
+        wiki = ThrottlingWiki(throttle=10, retry_after=None)
+
+        async def fetch():
+            limiter = RateLimiter(max_retries=1, backoff_base=0.01)
+            async with AsyncWiktionaryParser(cache=MemoryCache(), rate_limiter=limiter) as parser:
+                parser.url = wiki.url
+                with self.assertRaises(aiohttp.ClientResponseError) as raised:
+                    await parser.fetch('test')
+                return raised.exception, len(parser.cache)
+
+        loop = asyncio.new_event_loop()
+        try:
+            error, cached = loop.run_until_complete(fetch())
+        finally:
+            loop.close()
+            wiki.close()
+        self.assertEqual(error.status, 429)
+        self.assertEqual(cached, 0)
+        self.assertEqual(wiki.requests, 2)
+
+    def test_async_requests_per_second_uses_a_rate_limiter(self):
+        wiki = ThrottlingWiki(throttle=1)
+
+        async def fetch():
+            async with AsyncWiktionaryParser(requests_per_second=100) as parser:
+                parser.url = wiki.url
+                await parser.fetch('test')
+                return parser.rate_limiter
+
+        loop = asyncio.new_event_loop()
+        try:
+            limiter = loop.run_until_complete(fetch())
+        finally:
+            loop.close()
+            wiki.close()
+        self.assertEqual(limiter.requests_per_second, 100)
+        self.assertEqual(limiter.stats()['throttled'], 1)
+        self.assertEqual(wiki.requests, 2)
+
+    def test_async_parser_retries_throttled_requests(self):
+        wiki = ThrottlingWiki(throttle=1)
+
+        async def fetch():
+            async with AsyncWiktionaryParser(rate_limiter=RateLimiter(requests_per_second=100)) as parser:
+                parser.url = wiki.url
+                return await parser.fetch('test')
+
+        loop = asyncio.new_event_loop()
+        try:
+            result = loop.run_until_complete(fetch())
+        finally:
+            loop.close()
+            wiki.close()
+        self.assertEqual(result[0]['definitions'][0]['text'], ['A challenge.'])
+        self.assertEqual(wiki.requests, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,178 @@
+import asyncio
+import gzip
+import threading
+import unittest
+import mock
+import socketserver
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import aiohttp
+import requests
+from bs4 import BeautifulSoup
+from wiktionaryparser import WiktionaryParser, AsyncWiktionaryParser, MemoryCache
+
+
+class ThreadingHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+    # http.server.ThreadingHTTPServer needs Python 3.7.
+    daemon_threads = True
+
+
+def make_page(revision_id, definition, served_at=0):
+    return (
+        f'<html><head><script>RLCONF={{"wgRevisionId":{revision_id}}};</script></head><body>'
+        '<div class="mw-heading mw-heading2"><h2 id="English">English</h2></div>'
+        '<div class="mw-heading mw-heading3"><h3 id="Noun">Noun</h3></div>'
+        f'<ol><li>{definition}</li></ol><!-- served at {served_at} --></body></html>'
+    )
+
+
+class StandInWiki(object):
+    """A local stand-in for Wiktionary answering conditional requests."""
+
+    def __init__(self):
+        self.revision_id = 1
+        self.definition = 'A challenge.'
+        self.send_validators = True
+        self.compress = False
+        self.error_status = None
+        self.requests = []
+        wiki = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                etag = f'"rev-{wiki.revision_id}"'
+                wiki.requests.append(self.headers)
+                if wiki.error_status is not None:
+                    body = b'<html><body>Service unavailable</body></html>'
+                    self.send_response(wiki.error_status)
+                    self.send_header('Content-Type', 'text/html; charset=utf-8')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+                if wiki.send_validators and self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+                body = make_page(wiki.revision_id, wiki.definition, len(wiki.requests)).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                if wiki.compress and 'gzip' in self.headers.get('Accept-Encoding', ''):
+                    body = gzip.compress(body)
+                    self.send_header('Content-Encoding', 'gzip')
+                self.send_header('Content-Length', str(len(body)))
+                if wiki.send_validators:
+                    self.send_header('ETag', etag)
+                    self.send_header('Last-Modified', 'Sat, 17 Oct 2026 00:00:00 GMT')
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/wiki/{{}}'
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class TestRevalidation(unittest.TestCase):
+    def setUp(self):
+        self.wiki = StandInWiki()
+        self.parser = WiktionaryParser(cache=MemoryCache(), result_cache=MemoryCache(), revalidate=True)
+        self.parser.url = self.wiki.url
+
+    def tearDown(self):
+        self.wiki.close()
+
+    def definitions(self, result):
+        return [definition['text'] for entry in result for definition in entry['definitions']]
+
+    def test_unchanged_pages_are_revalidated_and_not_parsed_again(self):
+        with mock.patch('wiktionaryparser.core.BeautifulSoup', wraps=BeautifulSoup) as mock_soup:
+            first = self.parser.fetch('test')
+            second = self.parser.fetch('test')
+            self.assertEqual(mock_soup.call_count, 1)
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.wiki.requests), 2)
+        self.assertNotIn('If-None-Match', self.wiki.requests[0])
+        self.assertEqual(self.wiki.requests[1].get('If-None-Match'), '"rev-1"')
+        self.assertEqual(self.wiki.requests[1].get('If-Modified-Since'), 'Sat, 17 Oct 2026 00:00:00 GMT')
+
+    def test_changed_pages_are_downloaded_again(self):
+        self.assertEqual(self.definitions(self.parser.fetch('test')), [['A challenge.']])
+        self.wiki.revision_id = 2
+        self.wiki.definition = 'A trial.'
+        self.assertEqual(self.definitions(self.parser.fetch('test')), [['A trial.']])
+        self.assertEqual(self.parser.get_revalidation_entry('test')['etag'], '"rev-2"')
+
+    def test_same_revision_keeps_the_cached_page(self):
+        self.wiki.send_validators = False
+        first = self.parser.download('test')
+        second = self.parser.download('test')
+        self.assertEqual(len(self.wiki.requests), 2)
+        self.assertEqual(first, second)
+
+    def test_fresh_pages_are_not_revalidated(self):
+        self.parser.cache.ttl = 3600
+        self.parser.fetch('test')
+        self.parser.fetch('test')
+        self.assertEqual(len(self.wiki.requests), 1)
+
+    def test_pinned_revisions_skip_revalidation(self):
+        self.parser.fetch('test', old_id=1)
+        self.parser.fetch('test', old_id=1)
+        self.assertEqual(len(self.wiki.requests), 1)
+        self.assertIsNone(self.parser.get_revalidation_entry('test'))
+
+    def test_error_answers_keep_the_cached_page(self):
+        first = self.parser.fetch('test')
+        self.wiki.error_status = 500
+        with self.assertRaises(requests.HTTPError):
+            self.parser.fetch('test')
+        self.assertIn('A challenge.', self.parser.get_revalidation_entry('test')['html'])
+
+        self.wiki.error_status = None
+        self.assertEqual(self.parser.fetch('test'), first)
+        self.assertEqual(self.wiki.requests[-1].get('If-None-Match'), '"rev-1"')
+
+    def test_async_parser_keeps_the_cached_page_on_errors(self):
+        async def fetch_during_outage():
+            async with AsyncWiktionaryParser(cache=MemoryCache(), revalidate=True) as parser:
+                parser.url = self.wiki.url
+                await parser.fetch('test')
+                self.wiki.error_status = 503
+                with self.assertRaises(aiohttp.ClientResponseError):
+                    await parser.fetch('test')
+                return parser.get_revalidation_entry('test')
+
+        loop = asyncio.new_event_loop()
+        try:
+            entry = loop.run_until_complete(fetch_during_outage())
+        finally:
+            loop.close()
+        self.assertIn('A challenge.', entry['html'])
+
+    def test_async_parser_revalidates_too(self):
+        async def fetch_twice():
+            async with AsyncWiktionaryParser(cache=MemoryCache(), revalidate=True) as parser:
+                parser.url = self.wiki.url
+                return await parser.fetch('test'), await parser.fetch('test')
+
+        loop = asyncio.new_event_loop()
+        try:
+            first, second = loop.run_until_complete(fetch_twice())
+        finally:
+            loop.close()
+        self.assertEqual(first, second)
+        self.assertEqual(self.definitions(first), [['A challenge.']])
+        self.assertEqual(self.wiki.requests[1].get('If-None-Match'), '"rev-1"')
+
+
+if __name__ == '__main__':
+    unittest.main()
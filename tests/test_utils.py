@@ -0,0 +1,44 @@
+import json
+import unittest
+import mock
+from wiktionaryparser import WiktionaryParser, WordData, Definition, RelatedWord, MemoryCache, dumps
+from tests.test_core import sample_html
+
+
+class TestResultModel(unittest.TestCase):
+    def test_objects_have_no_instance_dict(self):
+        for obj in (WordData(), Definition(), RelatedWord()):
+            self.assertFalse(hasattr(obj, '__dict__'))
+            with self.assertRaises(AttributeError):
+                obj.misspelled_attribute = 1
+
+    def test_objects_round_trip_through_json(self):
+        parser = WiktionaryParser()
+        expected = parser.parse_html(sample_html, 'test')
+        result = parser.parse_html(sample_html, 'test', objects=True)
+        self.assertTrue(all(isinstance(entry, WordData) for entry in result))
+        self.assertEqual([entry.to_json() for entry in result], expected)
+        self.assertEqual([WordData.from_json(entry).to_json() for entry in expected], expected)
+
+    def test_objects_are_rebuilt_from_the_result_cache(self):
+        parser = WiktionaryParser(result_cache=MemoryCache())
+        expected = parser.parse_html(sample_html, 'test')
+        result = parser.parse_html(sample_html, 'test', objects=True)
+        self.assertEqual(parser.result_cache.hits, 1)
+        self.assertEqual([entry.to_json() for entry in result], expected)
+
+    def test_dumps_gives_the_same_json_with_and_without_orjson(self):
+        parser = WiktionaryParser()
+        expected = parser.parse_html(sample_html, 'test')
+        result = parser.parse_html(sample_html, 'test', objects=True)
+        lazy_result = parser.parse_html(sample_html, 'test', lazy=True)
+        serialized = dumps(result)
+        self.assertIsInstance(serialized, bytes)
+        self.assertEqual(json.loads(serialized), expected)
+        self.assertEqual(json.loads(dumps(lazy_result)), expected)
+        with mock.patch('wiktionaryparser.utils.orjson', None):
+            self.assertEqual(dumps(result), serialized)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -15,10 +15,18 @@ def update_tests(mock_get):
             fetch_languages.setdefault(language, {}).update({word: result})
             pack_languages.setdefault(language, {}).update({word: parser.pack_definitions_and_examples(result)})
             progress_bar.update()
+    parse_html_languages = {}
+    for word, old_id, language in test_words:
+        with open(os.path.join(html_test_files_dir, f'{language}-{word}-{old_id}.html'), 'r', encoding='utf-8') as f:
+            html = modernize_headings(f.read())
+        parser.set_language(language)
+        parse_html_languages.setdefault(language, {}).update({word: parser.parse_html(html, word)})
     with open('test_fetch_output.json', 'w') as f:
         f.write(json.dumps(fetch_languages, ensure_ascii=False, indent=4))
     with open('test_pack_output.json', 'w') as f:
         f.write(json.dumps(pack_languages, ensure_ascii=False, indent=4))
+    with open('test_parse_html_output.json', 'w') as f:
+        f.write(json.dumps(parse_html_languages, ensure_ascii=False, indent=4))
 
 
 update_tests()
@@ -1,11 +1,24 @@
-from wiktionaryparser.utils import WordData, Definition, RelatedWord
+from wiktionaryparser.utils import WordData, Definition, RelatedWord, dumps
 from wiktionaryparser.core import PARTS_OF_SPEECH, RELATIONS, WiktionaryParser
+from wiktionaryparser.aio import AsyncWiktionaryParser
+from wiktionaryparser.engine import ParserPool
+from wiktionaryparser.cache import MemoryCache, SQLiteCache
+from wiktionaryparser.metrics import ParserMetrics
+from wiktionaryparser.ratelimit import RateLimiter
 
 __all__ = [
     'WordData',
     'Definition',
     'RelatedWord',
+    'dumps',
     'PARTS_OF_SPEECH',
     'RELATIONS',
-    'WiktionaryParser'
+    'WiktionaryParser',
+    'AsyncWiktionaryParser',
+    'MemoryCache',
+    'SQLiteCache',
+    'ParserPool',
+    'ParserMetrics',
+    'RateLimiter'
 ]
+
@@ -0,0 +1,4 @@
+import sys
+from wiktionaryparser.cli import main
+
+sys.exit(main())
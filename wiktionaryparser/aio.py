@@ -0,0 +1,172 @@
+from functools import partial
+from urllib.parse import urlsplit
+from wiktionaryparser.core import WiktionaryParser, HTMLStreamDecoder, CHUNK_SIZE
+from wiktionaryparser.ratelimit import RateLimiter
+
+# asyncio and aiohttp are slow to import, so they are only imported when the
+# first AsyncWiktionaryParser is created.
+asyncio = None
+aiohttp = None
+
+
+def import_async_modules():
+    global asyncio, aiohttp
+    import asyncio
+    try:
+        import aiohttp
+    except ImportError:
+        raise ImportError("AsyncWiktionaryParser requires aiohttp, install it with 'pip install wiktionaryparser[async]'") from None
+
+
+class AsyncWiktionaryParser(WiktionaryParser):
+    """WiktionaryParser whose downloads go through aiohttp.
+
+    fetch, fetch_many and iter_fetch are coroutines here; parsing reuses the
+    synchronous methods of WiktionaryParser and runs in the event loop's
+    default executor, so it doesn't hold up other coroutines. At most
+    `max_concurrency` requests are in flight at once. `requests_per_second`
+    is a shorthand for a rate_limiter spacing out requests to each host by
+    that rate.
+    """
+
+    def __init__(self, max_concurrency=20, requests_per_second=None, pool_size=10, cache=None, result_cache=None,
+                 metrics=None, revalidate=False, rate_limiter=None):
+        import_async_modules()
+        if rate_limiter is None and requests_per_second:
+            rate_limiter = RateLimiter(requests_per_second=requests_per_second, burst=1)
+        super(AsyncWiktionaryParser, self).__init__(pool_size=pool_size, cache=cache, result_cache=result_cache,
+                                                    metrics=metrics, revalidate=revalidate, rate_limiter=rate_limiter)
+        self.max_concurrency = max_concurrency
+        self.client = None
+        self._semaphore = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.close()
+            self.client = None
+
+    def _get_client(self):
+        if self.client is None:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+            self.client = aiohttp.ClientSession(connector=connector, headers={'user-agent': self.get_user_agent()})
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self.client
+
+    async def request_page(self, client, url, **kwargs):
+        host = urlsplit(url).netloc
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                with self.measure('rate_limit'):
+                    await self.rate_limiter.acquire_async(host)
+            response = await client.get(url, **kwargs)
+            if self.rate_limiter is None or not self.rate_limiter.is_throttled(response.status):
+                return response
+            response.release()
+            self.rate_limiter.throttle(host, response.headers.get('Retry-After'), attempt)
+            if not self.rate_limiter.should_retry(response.status, attempt):
+                response.raise_for_status()
+            self.rate_limiter.record_retry()
+            attempt += 1
+
+    async def read_response(self, response):
+        decoder = HTMLStreamDecoder(response.charset or 'utf-8')
+        async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+            decoder.feed(chunk)
+        return decoder.close()
+
+    async def download_revalidated(self, word):
+        entry = self.get_revalidation_entry(word)
+        if entry is not None and self.is_fresh(entry):
+            return entry['html']
+        client = self._get_client()
+        url = self.url.format(word)
+        async with self._semaphore:
+            with self.measure('http'):
+                async with await self.request_page(client, url, headers=self.revalidation_headers(entry)) as response:
+                    if response.status == 304 and entry is not None:
+                        html = None
+                    else:
+                        response.raise_for_status()
+                        html = await self.read_response(response)
+                    status, headers = response.status, response.headers
+        return self.store_revalidated_page(word, entry, status, headers, html)
+
+    async def download(self, word, old_id=None):
+        if old_id is None and self.revalidate and self.cache is not None:
+            return await self.download_revalidated(word)
+        cache_key = (self.language_code, word, old_id)
+        if self.cache is not None:
+            html = self.cache.get(cache_key)
+            if html is not None:
+                return html
+        client = self._get_client()
+        url = self.url.format(word)
+        params = {'oldid': old_id} if old_id is not None else {}
+        async with self._semaphore:
+            with self.measure('http'):
+                async with await self.request_page(client, url, params=params) as response:
+                    response.raise_for_status()
+                    html = await self.read_response(response)
+        if self.cache is not None:
+            self.cache.set(cache_key, html, expires=old_id is None)
+        return html
+
+    async def parse_in_executor(self, html, word, *args, **kwargs):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, partial(self.parse_html, html, word, *args, **kwargs))
+
+    async def fetch(self, word, language=None, old_id=None, languages=None, fields=None, lazy=False, objects=False):
+        html = await self.download(word, old_id)
+        return await self.parse_in_executor(html, word, language, languages, fields, lazy, objects)
+
+    async def iter_fetch(self, words, language=None, old_id=None, fields=None, objects=False):
+        """Download pages concurrently and yield (word, result) as each one arrives.
+
+        Like WiktionaryParser.iter_fetch, `words` is read as downloads finish,
+        with at most twice `max_concurrency` pages downloading or waiting to be
+        parsed at a time, so long inputs can be streamed through.
+        """
+        async def download(word, word_old_id):
+            try:
+                return word, await self.download(word, word_old_id), None
+            except Exception as e:
+                return word, None, e
+
+        words = iter(words)
+        pending = set()
+        try:
+            while True:
+                for item in words:
+                    word, word_old_id = item if isinstance(item, tuple) else (item, old_id)
+                    pending.add(asyncio.ensure_future(download(word, word_old_id)))
+                    if len(pending) >= self.max_concurrency * 2:
+                        break
+                if not pending:
+                    return
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    word, html, error = task.result()
+                    if error is None:
+                        try:
+                            result = await self.parse_in_executor(html, word, language, fields=fields, objects=objects)
+                        except Exception as e:
+                            result = e
+                    else:
+                        result = error
+                    yield word, result
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def fetch_many(self, words, language=None, old_id=None, fields=None, objects=False):
+        results = {}
+        async for word, result in self.iter_fetch(words, language, old_id, fields, objects):
+            results[word] = result
+        return results
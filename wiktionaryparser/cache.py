@@ -0,0 +1,118 @@
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+
+class BaseCache(ABC):
+    """Key/value store used by WiktionaryParser to avoid repeated work.
+
+    Values must be JSON serializable. Entries stored with expires=True are
+    dropped `ttl` seconds after they were written (never when ttl is None),
+    entries stored with expires=False are kept until evicted.
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            value = self._get(key, time.time())
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def set(self, key, value, expires=True):
+        expires_at = time.time() + self.ttl if expires and self.ttl is not None else None
+        with self.lock:
+            self._set(key, value, expires_at)
+
+    def stats(self):
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self)}
+
+    @abstractmethod
+    def _get(self, key, now):
+        """Return the value stored under `key`, or None if it is missing or expired at `now`."""
+
+    @abstractmethod
+    def _set(self, key, value, expires_at):
+        """Store `value` under `key` until `expires_at`, or until evicted when it is None."""
+
+    @abstractmethod
+    def __len__(self):
+        """Number of entries stored."""
+
+
+class MemoryCache(BaseCache):
+    """In-memory cache evicting the least recently used entry past max_size."""
+
+    def __init__(self, max_size=1024, ttl=None):
+        super(MemoryCache, self).__init__(ttl)
+        self.max_size = max_size
+        self.entries = OrderedDict()
+
+    def _get(self, key, now):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= now:
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return value
+
+    def _set(self, key, value, expires_at):
+        self.entries[key] = (value, expires_at)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class SQLiteCache(BaseCache):
+    """Persistent cache storing zlib compressed JSON values in a sqlite file."""
+
+    def __init__(self, path, ttl=None):
+        super(SQLiteCache, self).__init__(ttl)
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)')
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+    def _get(self, key, now):
+        key = json.dumps(key, ensure_ascii=False)
+        row = self.connection.execute('SELECT value, expires_at FROM cache WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at is not None and expires_at <= now:
+            self.connection.execute('DELETE FROM cache WHERE key = ?', (key,))
+            self.connection.commit()
+            return None
+        return json.loads(zlib.decompress(value).decode('utf-8'))
+
+    def _set(self, key, value, expires_at):
+        key = json.dumps(key, ensure_ascii=False)
+        value = zlib.compress(json.dumps(value, ensure_ascii=False).encode('utf-8'))
+        self.connection.execute('INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)',
+                                (key, value, expires_at))
+        self.connection.commit()
+
+    def __len__(self):
+        return self.connection.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
@@ -0,0 +1,111 @@
+import argparse
+import json
+import os
+import sys
+import time
+from wiktionaryparser.core import WiktionaryParser
+from wiktionaryparser.cache import SQLiteCache
+from wiktionaryparser.ratelimit import RateLimiter
+
+
+def read_words(lines, old_id=None, on_error=None):
+    """Read one word per line, optionally followed by a tab and an old_id.
+
+    A line whose old_id isn't a number raises ValueError, or is passed with
+    the error to `on_error(word, error)` and skipped when that is given.
+    """
+    for line_number, line in enumerate(lines, 1):
+        line = line.rstrip('\r\n')
+        if not line.strip():
+            continue
+        word, _, word_old_id = line.partition('\t')
+        if not word_old_id.strip():
+            yield word, old_id
+            continue
+        try:
+            yield word, int(word_old_id)
+        except ValueError:
+            error = ValueError(f'line {line_number}: invalid oldid {word_old_id!r}')
+            if on_error is None:
+                raise error from None
+            on_error(word, error)
+
+
+def build_argument_parser():
+    argument_parser = argparse.ArgumentParser(
+        prog='wiktionaryparser',
+        description='Look up words on Wiktionary and write one JSON object per word.')
+    argument_parser.add_argument('input', nargs='?', default='-',
+                                 help="file with one word per line, optionally followed by a tab and an oldid "
+                                      "(default: stdin)")
+    argument_parser.add_argument('-o', '--output', default='-', help='file to write JSON Lines to (default: stdout)')
+    argument_parser.add_argument('-l', '--language', help='language of the entries to parse (default: the edition language)')
+    argument_parser.add_argument('-e', '--edition', default='en', help='Wiktionary edition code (default: en)')
+    argument_parser.add_argument('--old-id', type=int, help='revision id used for words without their own oldid')
+    argument_parser.add_argument('-j', '--concurrency', type=int, default=8, help='concurrent downloads (default: 8)')
+    argument_parser.add_argument('--cache-dir', help='directory to cache downloaded pages in')
+    argument_parser.add_argument('--cache-ttl', type=float,
+                                 help='seconds before cached pages without an oldid are downloaded again')
+    argument_parser.add_argument('--revalidate', action='store_true',
+                                 help='check cached pages without an oldid with conditional requests instead of '
+                                      'downloading them again (needs --cache-dir)')
+    argument_parser.add_argument('--rate', type=float,
+                                 help='requests per second to send to Wiktionary, retrying throttled requests '
+                                      '(default: no limit)')
+    argument_parser.add_argument('--pack', action='store_true',
+                                 help='output pack_definitions_and_examples() instead of the fetch() result')
+    return argument_parser
+
+
+def main(argv=None):
+    argument_parser = build_argument_parser()
+    args = argument_parser.parse_args(argv)
+    if args.revalidate and not args.cache_dir:
+        argument_parser.error('--revalidate needs --cache-dir')
+    cache = None
+    if args.cache_dir:
+        os.makedirs(args.cache_dir, exist_ok=True)
+        cache = SQLiteCache(os.path.join(args.cache_dir, 'pages.sqlite'), ttl=args.cache_ttl)
+    rate_limiter = RateLimiter(requests_per_second=args.rate) if args.rate else None
+    parser = WiktionaryParser(pool_size=args.concurrency, cache=cache, revalidate=args.revalidate,
+                              rate_limiter=rate_limiter)
+    parser.set_language(args.edition)
+
+    input_file = sys.stdin if args.input == '-' else open(args.input, 'r', encoding='utf-8')
+    output_file = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    count = failed = 0
+    start = time.perf_counter()
+
+    def write_result(word, result):
+        nonlocal count, failed
+        if isinstance(result, Exception):
+            record = {'word': word, 'error': repr(result)}
+            failed += 1
+        else:
+            if args.pack and isinstance(result, list):
+                result = parser.pack_definitions_and_examples(result)
+            record = {'word': word, 'result': result}
+        output_file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        count += 1
+
+    try:
+        words = read_words(input_file, args.old_id, on_error=write_result)
+        for word, result in parser.iter_fetch(words, args.language, max_workers=args.concurrency):
+            write_result(word, result)
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+        if cache is not None:
+            cache.close()
+
+    elapsed = time.perf_counter() - start
+    stats = f"{count} words ({failed} failed) in {elapsed:.2f}s, {count / elapsed if elapsed else 0:.1f} words/s"
+    if cache is not None:
+        stats += f", cache hits: {cache.hits}, misses: {cache.misses}"
+    if rate_limiter is not None:
+        rate_stats = rate_limiter.stats()
+        stats += f", throttled: {rate_stats['throttled']}, waited: {rate_stats['wait_seconds']:.1f}s"
+    print(stats, file=sys.stderr)
+    return 1 if failed else 0
@@ -1,12 +1,22 @@
+import codecs
 import json
+import hashlib
+import threading
+import time
 import re, requests
 import pkgutil
-import pkg_resources
-from wiktionaryparser.utils import WordData, Definition, RelatedWord
-from bs4 import BeautifulSoup
+from wiktionaryparser.utils import WordData, Definition, RelatedWord, dumps
+from bs4 import BeautifulSoup, NavigableString, CData
 from itertools import zip_longest
 from copy import copy
 from string import digits
+from urllib.parse import urlsplit
+from urllib3.util.retry import Retry
+from bisect import bisect_left
+from functools import lru_cache
+from collections.abc import Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from html import unescape
 
 PARTS_OF_SPEECH = [
     "adjective", "adverb", "ambiposition", "article", "circumposition", "classifier",
@@ -32,9 +42,34 @@ RELATIONS = [
     "coordinate terms", "anagrams", "derived terms", "see also",
 ]
 
+DIGITS_TABLE = str.maketrans('', '', digits)
+NON_DEFINITION_HEADINGS = frozenset(['references', 'cited-source', 'derived characters'])
+
+# Both files are a few kilobytes, so reading them at import costs next to nothing.
 TRANSLATIONS = json.loads(pkgutil.get_data(__name__, "translations.json").decode("utf-8"))
 LANGUAGES = json.loads(pkgutil.get_data(__name__, "languages.json").decode("utf-8"))
 
+@lru_cache(maxsize=None)
+def get_version():
+    try:
+        from importlib.metadata import version, PackageNotFoundError
+    except ImportError:
+        import pkg_resources
+        try:
+            return pkg_resources.get_distribution('wiktionaryparser').version
+        except pkg_resources.DistributionNotFound:
+            return 'unknown'
+    try:
+        return version('wiktionaryparser')
+    except PackageNotFoundError:
+        return 'unknown'
+
+DIV_TAG_RE = re.compile(r'<(/?)div\b[^>]*>')
+TAG_RE = re.compile(r'<[^>]*>')
+TOC_TEXT_RE = re.compile(r'<span class="toctext">(.*?)</span>')
+REVISION_ID_RE = re.compile(r'"wgRevisionId":(\d+)')
+LANGUAGE_HEADING_RE = re.compile(r'<div class="mw-heading mw-heading2\b[^>]*>\s*<h2\b[^>]*>(.*?)</h2>', re.S)
+
 def is_subheading(child, parent):
     child_headings = child.split(".")
     parent_headings = parent.split(".")
@@ -45,41 +80,291 @@ def is_subheading(child, parent):
             return False
     return True
 
+class NullContext(object):
+    """Context manager that does nothing, standing in for contextlib.nullcontext,
+    which needs Python 3.7."""
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc_info):
+        return False
+
+NULL_CONTEXT = NullContext()
+
+CHUNK_SIZE = 64 * 1024
+
+class HTMLStreamDecoder(object):
+    """Decode a page from byte chunks as they are downloaded, joining '>\\n<'
+    into '><' chunk by chunk. The raw bytes of the page are never held in
+    full, but close() briefly holds the decoded chunks and their joined text
+    together, about twice the size of the page."""
+
+    def __init__(self, encoding='utf-8'):
+        self.decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        self.pieces = []
+        self.tail = ''
+
+    def feed(self, chunk):
+        text = self.tail + self.decoder.decode(chunk)
+        # A trailing '>' or '>\n' may be the start of a '>\n<' split across chunks.
+        if text.endswith('>'):
+            cut = len(text) - 1
+        elif text.endswith('>\n'):
+            cut = len(text) - 2
+        else:
+            cut = len(text)
+        self.pieces.append(text[:cut].replace('>\n<', '><'))
+        self.tail = text[cut:]
+
+    def close(self):
+        self.pieces.append((self.tail + self.decoder.decode(b'', final=True)).replace('>\n<', '><'))
+        html = ''.join(self.pieces)
+        self.pieces = []
+        self.tail = ''
+        return html
+
+def padded_index(index):
+    return ".".join(f"{int(num):02d}" for num in index.split(".") if num)
+
+def html_to_text(html):
+    return unescape(TAG_RE.sub('', html))
+
+def find_element_end(html, start):
+    depth = 0
+    for match in DIV_TAG_RE.finditer(html, start):
+        depth += -1 if match.group(1) else 1
+        if depth == 0:
+            return match.end()
+    return len(html)
+
+def find_section_end(html, start):
+    # A language section runs until the next language heading, which is kept as
+    # the section's last element so sibling walks stop the same way they do on
+    # the full page, or until its parent element is closed.
+    depth = 0
+    for match in DIV_TAG_RE.finditer(html, start):
+        if match.group(1):
+            if depth == 0:
+                return match.start()
+            depth -= 1
+        elif depth == 0 and match.start() > start and 'mw-heading2' in match.group(0):
+            return find_element_end(html, match.start())
+        else:
+            depth += 1
+    return len(html)
+
+def slice_language_sections(html, languages):
+    """Return the table of contents and the sections of `languages` cut out of
+    a page, or None when the page can't be sliced and has to be parsed whole."""
+    toc_start = html.find('<div id="toc"')
+    if toc_start == -1:
+        return None
+    toc_end = find_element_end(html, toc_start)
+    toc = html[toc_start:toc_end]
+    toc_languages = {html_to_text(text).lower() for text in TOC_TEXT_RE.findall(toc)}
+    remaining = set(languages)
+    if not remaining <= toc_languages:
+        return None
+    ranges = []
+    for match in LANGUAGE_HEADING_RE.finditer(html, toc_end):
+        language = html_to_text(match.group(1)).lower()
+        if language in remaining:
+            remaining.remove(language)
+            end = find_section_end(html, match.start())
+            # Adjacent sections share a heading, the first one's closing element.
+            if ranges and match.start() < ranges[-1][1]:
+                ranges[-1][1] = end
+            else:
+                ranges.append([match.start(), end])
+            if not remaining:
+                break
+    if remaining:
+        return None
+    return toc + ''.join(html[start:end] for start, end in ranges)
+
+# Sections of a word that can be selected with `fields`, in the order they are
+# parsed. parse_examples clears the quotations out of the definition lists, so it
+# has to run before parse_definitions.
+FIELDS = ['examples', 'definitions', 'etymologies', 'related', 'pronunciations']
+SECTION_PARSERS = {
+    'examples': 'parse_examples',
+    'definitions': 'parse_definitions',
+    'etymologies': 'parse_etymologies',
+    'related': 'parse_related_words',
+    'pronunciations': 'parse_pronunciations',
+}
+# The fields each key of a result entry is built from.
+ENTRY_FIELDS = {
+    'etymology': ['etymologies'],
+    'definitions': ['definitions', 'examples', 'related'],
+    'pronunciations': ['pronunciations'],
+}
+
+class ParseContext(object):
+    """State of the page being parsed, kept apart from the parser's configuration
+    so that one parser can work on several pages from different threads."""
+
+    def __init__(self, soup=None, word=None):
+        self.soup = soup
+        self.word = word
+        self.heading_index = None
+        self.toc = []
+        self.toc_entries = {}
+        self.id_lists = {}
+        self.lock = threading.RLock()
+
+class LazyResult(Sequence):
+    """The entries of a word, parsed one section at a time as they are read.
+
+    Behaves like the list returned by fetch(). Reading an entry's 'definitions'
+    runs the examples, definitions and related words parsers, 'etymology' and
+    'pronunciations' run their own parser, each only once for all entries.
+    """
+
+    def __init__(self, parser, context, word_contents):
+        self.parser = parser
+        self.context = context
+        self.word_contents = word_contents
+        self.word_data = {}
+        self.sections = {}
+        self.length = max(1, len(parser.get_id_list(word_contents, 'etymologies')))
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.length))]
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError('entry index out of range')
+        return LazyEntry(self, index)
+
+    def __eq__(self, other):
+        if isinstance(other, LazyResult):
+            other = other.to_json()
+        return self.to_json() == other
+
+    def __repr__(self):
+        return f'<LazyResult {self.context.word!r}, {self.length} entries>'
+
+    def section(self, key):
+        with self.context.lock:
+            if key not in self.sections:
+                self.parser.context = self.context
+                fields = ENTRY_FIELDS[key]
+                self.parser.parse_sections(self.word_contents, fields, self.word_data)
+                with self.parser.measure('serialize'):
+                    entries = self.parser.map_to_object(
+                        self.parser.select_sections(self.word_contents, self.word_data, fields))
+                self.sections[key] = [entry[key] for entry in entries]
+            return self.sections[key]
+
+    def to_json(self):
+        return [dict(entry) for entry in self]
+
+class LazyEntry(Mapping):
+    def __init__(self, result, index):
+        self.result = result
+        self.index = index
+
+    def __getitem__(self, key):
+        if key not in ENTRY_FIELDS:
+            raise KeyError(key)
+        return self.result.section(key)[self.index]
+
+    def __iter__(self):
+        return iter(ENTRY_FIELDS)
+
+    def __len__(self):
+        return len(ENTRY_FIELDS)
+
+    def __repr__(self):
+        return f'<LazyEntry {self.index} of {self.result.context.word!r}>'
+
 class WiktionaryParser(object):
-    def __init__(self):
+    def __init__(self, pool_size=10, cache=None, result_cache=None, backend='html.parser', metrics=None,
+                 revalidate=False, rate_limiter=None):
         self.url = "https://en.wiktionary.org/wiki/{}?useskin=vector"
-        self.soup = None
+        self.local = threading.local()
+        self.backend = backend
         self.session = requests.Session()
-        self.session.mount("http://", requests.adapters.HTTPAdapter(max_retries = 2))
-        self.session.mount("https://", requests.adapters.HTTPAdapter(max_retries = 2))
+        # With a rate limiter, 429 and 503 answers are left to it instead of urllib3.
+        max_retries = 2 if rate_limiter is None else Retry(2, respect_retry_after_header=False)
+        self.session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize = pool_size, max_retries = max_retries))
+        self.session.mount("https://", requests.adapters.HTTPAdapter(pool_maxsize = pool_size, max_retries = max_retries))
+        self.cache = cache
+        self.result_cache = result_cache
+        self.metrics = metrics
+        self.revalidate = revalidate
+        self.rate_limiter = rate_limiter
         self.language = 'english'
         self.language_code = 'en'
-        self.current_word = None
         self.PARTS_OF_SPEECH = copy(PARTS_OF_SPEECH)
         self.RELATIONS = copy(RELATIONS)
         self.INCLUDED_ITEMS = self.RELATIONS + self.PARTS_OF_SPEECH + ['etymology', 'pronunciation']
+        self.section_names = None
+
+    @property
+    def context(self):
+        context = getattr(self.local, 'context', None)
+        if context is None:
+            context = self.local.context = ParseContext()
+        return context
+
+    @context.setter
+    def context(self, context):
+        self.local.context = context
+
+    @property
+    def soup(self):
+        return self.context.soup
+
+    @soup.setter
+    def soup(self, soup):
+        self.context = ParseContext(soup, self.context.word)
+
+    @property
+    def current_word(self):
+        return self.context.word
+
+    @current_word.setter
+    def current_word(self, word):
+        self.context.word = word
+
+    def measure(self, stage):
+        return self.metrics.measure(stage) if self.metrics is not None else NULL_CONTEXT
+
+    def measure_call(self, name):
+        return self.metrics.call(name) if self.metrics is not None else NULL_CONTEXT
 
     def include_part_of_speech(self, part_of_speech):
         part_of_speech = part_of_speech.lower()
         if part_of_speech not in self.PARTS_OF_SPEECH:
             self.PARTS_OF_SPEECH.append(part_of_speech)
             self.INCLUDED_ITEMS.append(part_of_speech)
+            self.section_names = None
 
     def exclude_part_of_speech(self, part_of_speech):
         part_of_speech = part_of_speech.lower()
         self.PARTS_OF_SPEECH.remove(part_of_speech)
         self.INCLUDED_ITEMS.remove(part_of_speech)
+        self.section_names = None
 
     def include_relation(self, relation):
         relation = relation.lower()
         if relation not in self.RELATIONS:
             self.RELATIONS.append(relation)
             self.INCLUDED_ITEMS.append(relation)
+            self.section_names = None
 
     def exclude_relation(self, relation):
         relation = relation.lower()
         self.RELATIONS.remove(relation)
         self.INCLUDED_ITEMS.remove(relation)
+        self.section_names = None
 
     def translate(self, related_id):
         if self.language_code == "en":
@@ -91,51 +376,148 @@ class WiktionaryParser(object):
             self.language_code = language_code.lower()
             self.language = LANGUAGES[self.language_code]
             self.url = f"https://{self.language_code}.wiktionary.org/wiki/{{}}?printable=yes"
+            self.section_names = None
 
     def get_language(self):
         return self.language
 
-    def clean_html(self):
+    def get_section_names(self):
+        """The translated section headings for each content type, as a list in
+        checking order and as a set for lookups. Rebuilt only after the language
+        or the included parts of speech and relations change."""
+        section_names = self.section_names
+        if section_names is None:
+            checklists = {
+                'etymologies': ['etymology'],
+                'pronunciation': ['pronunciation'],
+                'definitions': self.PARTS_OF_SPEECH,
+                'related': self.RELATIONS,
+                'included': self.INCLUDED_ITEMS,
+            }
+            section_names = {}
+            for content_type, checklist in checklists.items():
+                names = [self.translate(item) for item in checklist]
+                section_names[content_type] = (names, frozenset(names))
+            self.section_names = section_names
+        return section_names
+
+    def get_language_section(self, language):
+        for headline in self.soup.find_all('h2'):
+            if headline.text.lower() == language:
+                break
+        else:
+            return None
+        if 'mw-heading' in headline.parent.get('class', []):
+            headline = headline.parent
+        section = [headline]
+        for sibling in headline.next_siblings:
+            if sibling.name == 'h2' or (sibling.name and 'mw-heading2' in sibling.get('class', [])):
+                break
+            section.append(sibling)
+        return section
+
+    def clean_html(self, language=None):
         unwanted_classes = ['sister-wikipedia', 'thumb', 'reference', 'cited-source']
-        for tag in self.soup.find_all(True, {'class': unwanted_classes}):
-            tag.extract()
-        [x.decompose() for x in self.soup.findAll(
-            lambda tag: (not tag.contents or len(tag.get_text(strip=True)) <= 0) and not tag.name == 'br')]
+        section = None
+        # Without a table of contents, section ids are looked up across the whole
+        # page, so only pages with one can be cleaned one language at a time.
+        if language and self.soup.find('span', {'class': 'toctext'}) is not None:
+            section = self.get_language_section(language)
+        roots = [self.soup] if section is None else [tag for tag in section if tag.name]
+        for root in roots:
+            if root is not self.soup and set(root.get('class', [])) & set(unwanted_classes):
+                root.extract()
+                continue
+            for tag in root.find_all(True, {'class': unwanted_classes}):
+                tag.extract()
+        for root in roots:
+            if root.parent is not None or root is self.soup:
+                self.remove_empty_tags(root)
+
+    def remove_empty_tags(self, root):
+        # A tag is empty when none of the strings below it that its own get_text()
+        # would return have any non-whitespace characters. Walking the tags in
+        # reverse document order visits children before their parents, so the
+        # string types found below each tag are known when its parent is reached.
+        tags = root.find_all(True)
+        if root is not self.soup:
+            tags.insert(0, root)
+        found_types = {}
+        empty_tags = set()
+        for tag in reversed(tags):
+            types = set()
+            for child in tag.contents:
+                if isinstance(child, NavigableString):
+                    if child and not child.isspace():
+                        types.add(type(child))
+                else:
+                    types |= found_types[id(child)]
+            found_types[id(tag)] = types
+            if tag.name != 'br' and types.isdisjoint(getattr(tag, 'interesting_string_types', (NavigableString, CData))):
+                empty_tags.add(id(tag))
+        for tag in reversed(tags):
+            if id(tag) in empty_tags and id(tag.parent) not in empty_tags:
+                tag.decompose()
 
     def remove_digits(self, string):
-        return string.translate(str.maketrans('', '', digits)).strip()
+        return string.translate(DIGITS_TABLE).strip()
 
     def count_digits(self, string):
         return len(list(filter(str.isdigit, string)))
 
+    def index_soup(self):
+        context = self.context
+        if context.heading_index is not None:
+            return context
+        context.heading_index = {}
+        for heading in context.soup.find_all(['h2', 'h3', 'h4', 'h5'], id=True):
+            context.heading_index.setdefault(heading['id'], heading)
+        context.toc = [(content, content.find_previous().text, content.text)
+                       for content in context.soup.find_all('span', {'class': 'toctext'})]
+        context.toc_entries = {id(content): (index, text) for content, index, text in context.toc}
+        return context
+
+    def get_toc_entry(self, content_tag):
+        entry = self.index_soup().toc_entries.get(id(content_tag))
+        if entry is None:
+            entry = (content_tag.find_previous().text, content_tag.text)
+        return entry
+
+    def get_heading(self, heading_id):
+        return self.index_soup().heading_index.get(heading_id)
+
     def get_id_list(self, contents, content_type):
-        if content_type == 'etymologies':
-            checklist = ['etymology']
-        elif content_type == 'pronunciation':
-            checklist = ['pronunciation']
-        elif content_type == 'definitions':
-            checklist = self.PARTS_OF_SPEECH
-            if self.language == 'chinese':
-                checklist += self.current_word
-        elif content_type == 'related':
-            checklist = self.RELATIONS
-        else:
+        context = self.index_soup()
+        cached = context.id_lists.get(content_type)
+        if cached is not None and cached[0] is contents:
+            return cached[1]
+        id_list = self.build_id_list(contents, content_type)
+        context.id_lists[content_type] = (contents, id_list)
+        return id_list
+
+    def build_id_list(self, contents, content_type):
+        if content_type not in ('etymologies', 'pronunciation', 'definitions', 'related'):
             return None
-        checklist = [self.translate(item) for item in checklist]
+        checklist, names = self.get_section_names()[content_type]
+        if content_type == 'definitions' and self.language == 'chinese':
+            characters = [self.translate(item) for item in self.current_word]
+            checklist = checklist + characters
+            names = names.union(characters)
         id_list = []
         if len(contents) == 0:
-            return [('1', x.capitalize().replace(' ', '_'), x) for x in checklist if self.soup.find(['h2','h3','h4','h5'], {'id': x.capitalize().replace(' ', '_')})]
+            heading_index = self.index_soup().heading_index
+            return [('1', x.capitalize().replace(' ', '_'), x) for x in checklist if x.capitalize().replace(' ', '_') in heading_index]
         for content_tag in contents:
-            content_index = content_tag.find_previous().text
-            text_to_check = self.remove_digits(content_tag.text).strip().lower()
-            if text_to_check in checklist:
+            content_index, content_text = self.get_toc_entry(content_tag)
+            text_to_check = self.remove_digits(content_text).strip().lower()
+            if text_to_check in names:
                 content_id = content_tag.parent['href'].replace('#', '')
                 id_list.append((content_index, content_id, text_to_check))
         if len(id_list) == 0 and content_type == 'definitions':
             for content_tag in contents:
-                content_index = content_tag.find_previous().text
-                text_to_check = self.remove_digits(content_tag.text).strip().lower()
-                if text_to_check not in ['references', 'cited-source', 'derived characters']:
+                content_index, content_text = self.get_toc_entry(content_tag)
+                text_to_check = self.remove_digits(content_text).strip().lower()
+                if text_to_check not in NON_DEFINITION_HEADINGS:
                     content_id = content_tag.parent['href'].replace('#', '')
                     id_list.append((content_index, content_id, text_to_check))
         return id_list
@@ -160,15 +542,30 @@ class WiktionaryParser(object):
             disambig.append(re.sub(r'See also: ', '', content.text))
         return disambig
 
-    def get_word_data(self, language):
-        contents = self.soup.find_all('span', {'class': 'toctext'})
+    def get_word_data(self, language, fields=None, lazy=False, objects=False):
+        word_contents = self.get_word_contents(language)
+        if word_contents is None:
+            return self.no_entry()
+        if lazy:
+            if objects:
+                raise ValueError('Lazy results are made of dicts, objects=True cannot be used with lazy=True')
+            return LazyResult(self, self.context, word_contents)
+        fields = self.resolve_fields(fields)
+        word_data = self.parse_sections(word_contents, fields)
+        with self.measure('serialize'):
+            json_obj_list = self.map_to_object(self.select_sections(word_contents, word_data, fields), objects)
+        return json_obj_list
+
+    def get_word_contents(self, language):
+        toc = self.index_soup().toc
+        contents = [content for content, _, _ in toc]
         word_contents = []
         start_index = None
-        for content in contents:
-            if content.text.lower() == language:
-                start_index = content.find_previous().text + '.'
+        for _, index, text in toc:
+            if text.lower() == language:
+                start_index = index + '.'
         if len(contents) != 0 and not start_index:
-            return self.no_entry()
+            return None
         if len(contents) == 0:
             headlines = self.soup.find_all('h2')
             did_find_language = False
@@ -176,28 +573,48 @@ class WiktionaryParser(object):
                 if headline.text.lower() == language:
                     did_find_language = True
             if not did_find_language:
-                return self.no_entry()
-        included_items = [self.translate(item) for item in self.INCLUDED_ITEMS]
-        for content in contents:
-            index = content.find_previous().text
-            content_text = self.remove_digits(content.text.lower())
+                return None
+        included_items = self.get_section_names()['included'][1]
+        for content, index, text in toc:
+            content_text = self.remove_digits(text.lower())
             if index.startswith(start_index) and content_text in included_items:
                 word_contents.append(content)
         if len(word_contents) == 0:
-            for content in contents:
-                index = content.find_previous().text
-                content_text = self.remove_digits(content.text.lower())
+            for content, index, _ in toc:
                 if index.startswith(start_index):
                     word_contents.append(content)
-        word_data = {
-            'examples': self.parse_examples(word_contents),
-            'definitions': self.parse_definitions(word_contents),
-            'etymologies': self.parse_etymologies(word_contents),
-            'related': self.parse_related_words(word_contents),
-            'pronunciations': self.parse_pronunciations(word_contents),
-        }
-        json_obj_list = self.map_to_object(word_data)
-        return json_obj_list
+        return word_contents
+
+    def resolve_fields(self, fields):
+        if fields is None:
+            return list(FIELDS)
+        fields = set(fields)
+        unknown = fields.difference(FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}. Choose from: {', '.join(FIELDS)}")
+        # Examples and related words are part of the definitions they belong to.
+        if fields.intersection(['examples', 'related']):
+            fields.add('definitions')
+        return [field for field in FIELDS if field in fields]
+
+    def parse_sections(self, word_contents, fields, word_data=None):
+        word_data = {} if word_data is None else word_data
+        required = set(fields)
+        if 'definitions' in required:
+            required.add('examples')
+        for field in FIELDS:
+            if field in required and field not in word_data:
+                stage = SECTION_PARSERS[field]
+                with self.measure(stage):
+                    word_data[field] = getattr(self, stage)(word_contents)
+        return word_data
+
+    def select_sections(self, word_contents, word_data, fields):
+        selected = {field: word_data[field] if field in fields else [] for field in FIELDS}
+        if 'etymologies' not in fields:
+            # Entries are still split by etymology, only their text is left out.
+            selected['etymologies'] = [(index, '') for index, _, _ in self.get_id_list(word_contents, 'etymologies')]
+        return selected
 
     def parse_pronunciations(self, word_contents):
         pronunciation_id_list = self.get_id_list(word_contents, 'pronunciation')
@@ -206,7 +623,7 @@ class WiktionaryParser(object):
         pronunciation_div_classes = ['mw-collapsible', 'vsSwitcher']
         for pronunciation_index, pronunciation_id, _ in pronunciation_id_list:
             pronunciation_text = []
-            span_tag = self.soup.find_all(['h2','h3','h4','h5'], {'id': pronunciation_id})[0]
+            span_tag = self.get_heading(pronunciation_id)
             list_tag = span_tag.parent
             list_tag = list_tag.find_next_sibling()
             while list_tag.name != 'div':
@@ -233,7 +650,7 @@ class WiktionaryParser(object):
         definition_tag = None
         for def_index, def_id, def_type in definition_id_list:
             definition_text = []
-            span_tag = self.soup.find_all(['h2','h3','h4','h5'], {'id': def_id})[0]
+            span_tag = self.get_heading(def_id)
             table = span_tag.parent.find_next_sibling()
             while table and table.name not in ['div', 'h2', 'h3', 'h4', 'h5']:
                 definition_tag = table
@@ -264,7 +681,7 @@ class WiktionaryParser(object):
         definition_id_list = self.get_id_list(word_contents, 'definitions')
         example_list = []
         for def_index, def_id, def_type in definition_id_list:
-            span_tag = self.soup.find_all(['h2','h3','h4','h5'], {'id': def_id})[0]
+            span_tag = self.get_heading(def_id)
             table = span_tag.parent
             while table is not None and table.name != 'ol':
                 table = table.find_next_sibling()
@@ -296,7 +713,7 @@ class WiktionaryParser(object):
         etymology_tag = None
         for etymology_index, etymology_id, _ in etymology_id_list:
             etymology_text = ''
-            span_tag = self.soup.find_all(['h2','h3','h4','h5'], {'id': etymology_id})[0]
+            span_tag = self.get_heading(etymology_id)
             next_tag = span_tag.parent.find_next_sibling()
             while next_tag:
                 if next_tag.get('class') is not None and 'mw-heading' in next_tag.get('class'):
@@ -316,7 +733,7 @@ class WiktionaryParser(object):
         related_words_list = []
         for related_index, related_id, relation_type in relation_id_list:
             words = []
-            span_tag = self.soup.find_all(['h2','h3','h4','h5'], {'id': related_id})[0]
+            span_tag = self.get_heading(related_id)
             parent_tag = span_tag.parent
             while parent_tag and not parent_tag.find_all('li'):
                 parent_tag = parent_tag.find_next_sibling()
@@ -326,98 +743,318 @@ class WiktionaryParser(object):
             related_words_list.append((related_index, words, relation_type))
         return related_words_list
 
-    def map_to_object(self, word_data):
+    def map_to_object(self, word_data, objects=False):
         json_obj_list = []
         if not word_data['etymologies']:
             word_data['etymologies'] = [('', '')]
+        # Section indices are compared as strings, as they always have been, so
+        # sorting them once lets each etymology find its sections by bisection.
+        pronunciations = word_data['pronunciations']
+        pronunciation_order = sorted(range(len(pronunciations)), key=lambda position: pronunciations[position][0])
+        pronunciation_keys = [pronunciations[position][0] for position in pronunciation_order]
+        pronunciations_by_digits = {}
+        for position, (pronunciation_index, _, _) in enumerate(pronunciations):
+            pronunciations_by_digits[self.count_digits(pronunciation_index)] = position
+        definitions = word_data['definitions']
+        definition_keys = [padded_index(definition_index) for definition_index, _, _ in definitions]
+        definition_order = sorted(range(len(definitions)), key=definition_keys.__getitem__)
+        definition_keys = [definition_keys[position] for position in definition_order]
+        definitions_by_index = {}
+        for position, (definition_index, _, _) in enumerate(definitions):
+            definitions_by_index.setdefault(definition_index, []).append(position)
+        # Every prefix of a section's index maps to the section, replacing the
+        # startswith() scans over all examples and related words.
+        examples_by_prefix = {}
+        for example_index, examples, _ in word_data['examples']:
+            for end in range(len(example_index) + 1):
+                examples_by_prefix[example_index[:end]] = examples
+        related_by_prefix = {}
+        for related_word_index, related_words, relation_type in word_data['related']:
+            for end in range(len(related_word_index) + 1):
+                related_by_prefix.setdefault(related_word_index[:end], []).append((relation_type, related_words))
         for (current_etymology, next_etymology) in zip_longest(word_data['etymologies'], word_data['etymologies'][1:], fillvalue=('999', '')):
             data_obj = WordData()
             data_obj.etymology = current_etymology[1]
-            for pronunciation_index, text, audio_links in word_data['pronunciations']:
-                if (self.count_digits(current_etymology[0]) == self.count_digits(pronunciation_index)) or (current_etymology[0] <= pronunciation_index < next_etymology[0]):
-                    data_obj.pronunciations = text
-                    data_obj.audio_links = audio_links
-            for definition_index, definition_text, definition_type in word_data['definitions']:
-                current_etymology_str = ".".join(f"{int(num):02d}" for num in current_etymology[0].split(".") if num)
-                definition_index_str = ".".join(f"{int(num):02d}" for num in definition_index.split(".") if num)
-                next_etymology_str = ".".join(f"{int(num):02d}" for num in next_etymology[0].split(".") if num)
-                if current_etymology_str <= definition_index_str < next_etymology_str \
-                        or is_subheading(current_etymology[0], definition_index):
+            matches = pronunciation_order[bisect_left(pronunciation_keys, current_etymology[0]):
+                                          bisect_left(pronunciation_keys, next_etymology[0])]
+            if pronunciations:
+                same_depth = pronunciations_by_digits.get(self.count_digits(current_etymology[0]))
+                if same_depth is not None:
+                    matches.append(same_depth)
+            if matches:
+                _, data_obj.pronunciations, data_obj.audio_links = pronunciations[max(matches)]
+            if definitions:
+                current_etymology_str = padded_index(current_etymology[0])
+                next_etymology_str = padded_index(next_etymology[0])
+                positions = set(definition_order[bisect_left(definition_keys, current_etymology_str):
+                                                 bisect_left(definition_keys, next_etymology_str)])
+                headings = current_etymology[0].split(".")
+                for end in range(1, len(headings)):
+                    positions.update(definitions_by_index.get(".".join(headings[:end]), []))
+                for position in sorted(positions):
+                    definition_index, definition_text, definition_type = definitions[position]
                     def_obj = Definition()
                     def_obj.text = definition_text
                     def_obj.part_of_speech = definition_type
-                    for example_index, examples, _ in word_data['examples']:
-                        if example_index.startswith(definition_index):
-                            def_obj.example_uses = examples
-                    for related_word_index, related_words, relation_type in word_data['related']:
-                        if related_word_index.startswith(definition_index):
-                            def_obj.related_words.append(RelatedWord(relation_type, related_words))
+                    if definition_index in examples_by_prefix:
+                        def_obj.example_uses = examples_by_prefix[definition_index]
+                    for relation_type, related_words in related_by_prefix.get(definition_index, []):
+                        def_obj.related_words.append(RelatedWord(relation_type, related_words))
                     data_obj.definition_list.append(def_obj)
-            json_obj_list.append(data_obj.to_json())
+            json_obj_list.append(data_obj if objects else data_obj.to_json())
         return json_obj_list
 
-    def fetch(self, word, language=None, old_id=None):
-        language = self.language if not language else language
-        version = pkg_resources.require('wiktionaryparser')[0].version
-        response = self.session.get(self.url.format(word), params={'oldid': old_id}, headers={'user-agent': 'WiktionaryParser/'+version})
-        self.soup = BeautifulSoup(response.text.replace('>\n<', '><'), 'html.parser')
-        self.current_word = word
-        self.clean_html()
-        return self.get_word_data(language.lower())
+    def resolve_language(self, language):
+        # languages.json names each edition's own language in that language, so
+        # a code can only stand for the language of the current edition.
+        language = language.lower()
+        if language == self.language or language not in LANGUAGES:
+            return language
+        if language != self.language_code:
+            raise ValueError(f"Language code {language!r} can't be used on the {self.language_code!r} edition, "
+                             f"give the language's name as that edition spells it instead")
+        return self.language
 
-    @staticmethod
-    def _pack_definitions_and_examples_recursive(
-            definitions_list: list, examples_list: list, output_list: list,
-            definitions_index=0, examples_index=0
-    ):
-        global overall_definitions_index
-
-        if definitions_index >= len(definitions_list):
-            return
-
-        while definitions_index < len(definitions_list) and type(definitions_list[definitions_index]) is list:
-            nested_list = []
-            WiktionaryParser._pack_definitions_and_examples_recursive(
-                definitions_list[definitions_index], examples_list, nested_list, 0, examples_index
-            )
-            output_list.append(nested_list)
-            definitions_index += 1
-
-            if definitions_index >= len(definitions_list):
-                return
-
-        # It's a heading - and examples' indexes ignore headings, so overall_definitions_index won't be incremented
-        if definitions_list[definitions_index][0] == "#":
-            output_list.append(definitions_list[definitions_index])
-            definitions_index += 1
-        else:
-            examples_to_pack = []
-            while (examples_index < len(examples_list) and
-                   examples_list[examples_index]["index"] <= overall_definitions_index):
-                if examples_list[examples_index]["index"] == overall_definitions_index:
-                    examples_to_pack.append(examples_list[examples_index]["text"])
-                examples_index += 1
-            if examples_to_pack:
-                output_list.append({
-                    "text": definitions_list[definitions_index],
-                    "examples": examples_to_pack
-                })
+    def parse_html(self, html, word, language=None, languages=None, fields=None, lazy=False, objects=False):
+        if hasattr(html, 'read'):
+            html = html.read()
+        if isinstance(html, bytes):
+            html = html.decode('utf-8')
+        with self.measure_call('parse_html'):
+            if languages is None:
+                language = self.language if not language else language
+                return self.parse_languages(html, word, [language], fields, lazy, objects)[language]
+            return self.parse_languages(html, word, languages, fields, lazy, objects)
+
+    def parse_languages(self, html, word, languages, fields=None, lazy=False, objects=False):
+        names = {language: self.resolve_language(language) for language in languages}
+        results = {}
+        result_keys = {}
+        if self.result_cache is not None:
+            for language, name in names.items():
+                result_keys[name] = self.get_result_cache_key(html, word, name, fields)
+                result = self.result_cache.get(result_keys[name])
+                if result is not None:
+                    result = json.loads(result)
+                    if objects and isinstance(result, list):
+                        result = [WordData.from_json(entry) for entry in result]
+                    results[name] = result
+        pending = [name for name in dict.fromkeys(names.values()) if name not in results]
+        if pending:
+            with self.measure('slice'):
+                # Downloaded pages are already joined, for them this is one scan
+                # that returns the same string without copying it.
+                html = html.replace('>\n<', '><')
+                sliced_html = slice_language_sections(html, pending)
+            if sliced_html is not None or len(pending) == 1:
+                # Sliced sections don't overlap, so they can all share one tree.
+                with self.measure('soup'):
+                    self.context = ParseContext(BeautifulSoup(sliced_html or html, self.backend), word)
+                for name in pending:
+                    with self.measure('clean'):
+                        self.clean_html(name)
+                for name in pending:
+                    results[name] = self.get_word_data(name, fields, lazy, objects)
             else:
-                output_list.append(definitions_list[definitions_index])
-            overall_definitions_index += 1
-            definitions_index += 1
+                for name in pending:
+                    with self.measure('soup'):
+                        self.context = ParseContext(BeautifulSoup(html, self.backend), word)
+                    with self.measure('clean'):
+                        self.clean_html(name)
+                    results[name] = self.get_word_data(name, fields, lazy, objects)
+            if self.result_cache is not None and not lazy:
+                for name in pending:
+                    self.result_cache.set(result_keys[name], dumps(results[name]).decode('utf-8'), expires=False)
+        return {language: results[name] for language, name in names.items()}
+
+    def get_result_cache_key(self, html, word, language, fields=None):
+        configuration = [word, language, self.language_code, self.backend,
+                         self.PARTS_OF_SPEECH, self.RELATIONS, self.INCLUDED_ITEMS, self.resolve_fields(fields)]
+        digest = hashlib.sha256(html.encode('utf-8'))
+        digest.update(json.dumps(configuration, ensure_ascii=False).encode('utf-8'))
+        return digest.hexdigest()
 
-        WiktionaryParser._pack_definitions_and_examples_recursive(
-            definitions_list, examples_list, output_list, definitions_index, examples_index
-        )
+    def get_user_agent(self):
+        return 'WiktionaryParser/' + get_version()
+
+    def get_revalidation_entry(self, word):
+        return self.cache.get((self.language_code, word, None, 'validated'))
+
+    def is_fresh(self, entry):
+        return self.cache.ttl is not None and time.time() - entry['checked_at'] < self.cache.ttl
+
+    def revalidation_headers(self, entry):
+        headers = {}
+        if entry is not None:
+            if entry['etag']:
+                headers['if-none-match'] = entry['etag']
+            if entry['last_modified']:
+                headers['if-modified-since'] = entry['last_modified']
+        return headers
+
+    def store_revalidated_page(self, word, entry, status, headers, html):
+        """Record the validators of a conditional request and return the page's
+        HTML. The cached HTML is kept when the server answers 304 Not Modified or
+        sends back the same revision, so results in the result_cache stay valid.
+        Only 200 and 304 answers update the cached entry."""
+        if entry is not None and status == 304:
+            html = entry['html']
+        elif status != 200:
+            return html
+        revision_id = REVISION_ID_RE.search(html)
+        revision_id = int(revision_id.group(1)) if revision_id else None
+        if entry is not None and revision_id is not None and revision_id == entry['revision_id']:
+            html = entry['html']
+        entry = {
+            'html': html,
+            'etag': headers.get('etag') or (entry['etag'] if status == 304 else None),
+            'last_modified': headers.get('last-modified') or (entry['last_modified'] if status == 304 else None),
+            'revision_id': revision_id,
+            'checked_at': time.time(),
+        }
+        self.cache.set((self.language_code, word, None, 'validated'), entry, expires=False)
+        return html
+
+    def download_revalidated(self, word):
+        entry = self.get_revalidation_entry(word)
+        if entry is not None and self.is_fresh(entry):
+            return entry['html']
+        headers = self.revalidation_headers(entry)
+        headers['user-agent'] = self.get_user_agent()
+        with self.measure('http'):
+            with self.request_page(self.url.format(word), headers=headers) as response:
+                if response.status_code == 304 and entry is not None:
+                    html = None
+                else:
+                    # An error answer must not replace a good cached page.
+                    response.raise_for_status()
+                    html = self.read_response(response)
+        return self.store_revalidated_page(word, entry, response.status_code, response.headers, html)
+
+    def request_page(self, url, **kwargs):
+        """GET a page as a stream, pacing requests and retrying throttled ones
+        through the rate_limiter when there is one. Raises requests.HTTPError
+        when the page is still throttled after max_retries retries."""
+        host = urlsplit(url).netloc
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                with self.measure('rate_limit'):
+                    self.rate_limiter.acquire(host)
+            response = self.session.get(url, stream=True, **kwargs)
+            if self.rate_limiter is None or not self.rate_limiter.is_throttled(response.status_code):
+                return response
+            response.close()
+            # Even the last throttled answer pauses the host for later requests.
+            self.rate_limiter.throttle(host, response.headers.get('retry-after'), attempt)
+            if not self.rate_limiter.should_retry(response.status_code, attempt):
+                response.raise_for_status()
+            self.rate_limiter.record_retry()
+            attempt += 1
+
+    def read_response(self, response):
+        decoder = HTMLStreamDecoder(response.encoding or 'utf-8')
+        for chunk in response.iter_content(CHUNK_SIZE):
+            decoder.feed(chunk)
+        return decoder.close()
+
+    def download(self, word, old_id=None):
+        if old_id is None and self.revalidate and self.cache is not None:
+            return self.download_revalidated(word)
+        cache_key = (self.language_code, word, old_id)
+        if self.cache is not None:
+            html = self.cache.get(cache_key)
+            if html is not None:
+                return html
+        with self.measure('http'):
+            with self.request_page(self.url.format(word), params={'oldid': old_id},
+                                   headers={'user-agent': self.get_user_agent()}) as response:
+                response.raise_for_status()
+                html = self.read_response(response)
+        if self.cache is not None:
+            self.cache.set(cache_key, html, expires=old_id is None)
+        return html
+
+    def fetch(self, word, language=None, old_id=None, languages=None, fields=None, lazy=False, objects=False):
+        with self.measure_call('fetch'):
+            return self.parse_html(self.download(word, old_id), word, language, languages, fields, lazy, objects)
+
+    def iter_fetch(self, words, language=None, old_id=None, max_workers=8, fields=None, objects=False):
+        """Download pages concurrently and yield (word, result) as each one arrives.
+
+        `words` may hold plain words or (word, old_id) tuples. Downloads run on
+        `max_workers` threads sharing the session's connection pool, parsing
+        happens on the calling thread. When a word fails, including when its
+        page is answered with an HTTP error status, its result is the raised
+        exception instead of the parsed data.
+        """
+        words = iter(words)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = {}
+            while True:
+                for item in words:
+                    word, word_old_id = item if isinstance(item, tuple) else (item, old_id)
+                    pending[executor.submit(self.download, word, word_old_id)] = word
+                    if len(pending) >= max_workers * 2:
+                        break
+                if not pending:
+                    return
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    word = pending.pop(future)
+                    try:
+                        result = self.parse_html(future.result(), word, language, fields=fields, objects=objects)
+                    except Exception as e:
+                        result = e
+                    yield word, result
+
+    def fetch_many(self, words, language=None, old_id=None, max_workers=8, fields=None, objects=False):
+        return dict(self.iter_fetch(words, language, old_id, max_workers, fields, objects))
 
     @staticmethod
-    def pack_definitions_and_examples(word: list) -> list:
-        def pack(definitions_list: list, examples_list: list, output_list: list):
-            global overall_definitions_index
-            overall_definitions_index = 0
-            WiktionaryParser._pack_definitions_and_examples_recursive(definitions_list, examples_list, output_list)
+    def _pack_definitions_and_examples(definitions_list: list, examples_list: list) -> list:
+        output_list = []
+        # Examples are indexed by their position among all the definitions of a
+        # part of speech, nested ones included.
+        overall_definitions_index = 0
+        # A nested list starts from the examples cursor of the list holding it,
+        # but doesn't move that cursor on.
+        stack = [[definitions_list, output_list, 0, 0]]
+        while stack:
+            frame = stack[-1]
+            definitions, output, definitions_index, examples_index = frame
+            if definitions_index >= len(definitions):
+                stack.pop()
+                continue
+            definition = definitions[definitions_index]
+            frame[2] = definitions_index + 1
+            if type(definition) is list:
+                nested_list = []
+                output.append(nested_list)
+                stack.append([definition, nested_list, 0, examples_index])
+            # It's a heading - and examples' indexes ignore headings, so overall_definitions_index won't be incremented
+            elif definition[0] == "#":
+                output.append(definition)
+            else:
+                examples_to_pack = []
+                while (examples_index < len(examples_list) and
+                       examples_list[examples_index]["index"] <= overall_definitions_index):
+                    if examples_list[examples_index]["index"] == overall_definitions_index:
+                        examples_to_pack.append(examples_list[examples_index]["text"])
+                    examples_index += 1
+                frame[3] = examples_index
+                if examples_to_pack:
+                    output.append({
+                        "text": definition,
+                        "examples": examples_to_pack
+                    })
+                else:
+                    output.append(definition)
+                overall_definitions_index += 1
+        return output_list
 
+    @staticmethod
+    def pack_definitions_and_examples(word: list) -> list:
         if not word or not word[0]["definitions"] or not word[0]["definitions"][0]["text"]:
             return []
 
@@ -428,8 +1065,7 @@ class WiktionaryParser(object):
                 part_of_speech_name = part_of_speech["partOfSpeech"]
                 definitions = part_of_speech["text"]
                 examples = part_of_speech["examples"]
-                packed_definitions_and_examples = []
-                pack(definitions, examples, packed_definitions_and_examples)
+                packed_definitions_and_examples = WiktionaryParser._pack_definitions_and_examples(definitions, examples)
                 if packed_definitions_and_examples:
                     parts_of_speech_list.append({
                         "part_of_speech": part_of_speech_name,
@@ -438,3 +1074,21 @@ class WiktionaryParser(object):
             if parts_of_speech_list:
                 etymologies_list.append(parts_of_speech_list)
         return etymologies_list
+
+    @staticmethod
+    def pack_many(words):
+        """Pack the results of several words at once.
+
+        Takes either a dict of word to result, as returned by fetch_many(), or
+        a list of results, and returns the same shape. Results that aren't
+        lists of entries, such as missing entries or exceptions, are kept as
+        they are.
+        """
+        def pack(result):
+            if isinstance(result, list):
+                return WiktionaryParser.pack_definitions_and_examples(result)
+            return result
+
+        if isinstance(words, dict):
+            return {word: pack(result) for word, result in words.items()}
+        return [pack(result) for result in words]
@@ -0,0 +1,86 @@
+import bz2
+import gzip
+import json
+from xml.etree import ElementTree
+from wiktionaryparser.core import WiktionaryParser
+
+
+def open_dump(path):
+    if path.endswith('.bz2'):
+        return bz2.open(path, 'rb')
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def iter_dump_pages(path, namespaces=(0,)):
+    """Yield (title, revision_id, wikitext) for every page of a MediaWiki XML dump.
+
+    The dump is read incrementally and every page is dropped from memory once
+    it has been yielded, so memory use doesn't grow with the size of the dump.
+    Redirects and pages outside `namespaces` are skipped.
+    """
+    with open_dump(path) as f:
+        context = ElementTree.iterparse(f, events=('start', 'end'))
+        _, root = next(context)
+        for event, element in context:
+            if event != 'end' or local_name(element.tag) != 'page':
+                continue
+            fields = {local_name(child.tag): child for child in element}
+            revision = {local_name(child.tag): child for child in fields.get('revision', [])}
+            title = fields['title'].text
+            namespace = int(fields['ns'].text) if 'ns' in fields else 0
+            is_redirect = 'redirect' in fields
+            revision_id = int(revision['id'].text) if 'id' in revision else None
+            text = (revision['text'].text or '') if 'text' in revision else ''
+            root.clear()
+            if not is_redirect and namespace in namespaces:
+                yield title, revision_id, text
+
+
+def parse_pages(pages, language=None, parser=None):
+    """Run (word, old_id, html) tuples through WiktionaryParser.parse_html.
+
+    Yields one JSON serializable record per page, holding either the parsed
+    `result` or the `error` that stopped the page from being parsed.
+    """
+    parser = parser if parser is not None else WiktionaryParser()
+    for word, old_id, html in pages:
+        try:
+            result = parser.parse_html(html, word, language)
+        except Exception as e:
+            yield {'word': word, 'oldid': old_id, 'error': repr(e)}
+        else:
+            yield {'word': word, 'oldid': old_id, 'result': result}
+
+
+def write_jsonl(records, output):
+    if isinstance(output, str):
+        with open(output, 'w', encoding='utf-8') as f:
+            return write_jsonl(records, f)
+    count = 0
+    for record in records:
+        output.write(json.dumps(record, ensure_ascii=False) + '\n')
+        count += 1
+    return count
+
+
+def parse_dump(path, output, render, language=None, parser=None, namespaces=(0,)):
+    """Parse every page of an XML dump and write the results as JSON Lines.
+
+    Dumps hold wikitext while the parser works on rendered HTML, so
+    `render(title, wikitext)` must return a page's HTML, for example from a
+    local MediaWiki or Parsoid instance. Pages it returns None for are skipped.
+    Returns the number of records written.
+    """
+    def rendered_pages():
+        for title, revision_id, wikitext in iter_dump_pages(path, namespaces):
+            html = render(title, wikitext)
+            if html is not None:
+                yield title, revision_id, html
+
+    return write_jsonl(parse_pages(rendered_pages(), language, parser), output)
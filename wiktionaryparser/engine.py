@@ -0,0 +1,83 @@
+import os
+from collections import deque
+from concurrent.futures import wait, FIRST_COMPLETED
+from wiktionaryparser.core import WiktionaryParser
+
+_worker_parser = None
+
+
+def _get_worker_parser(language_code, parser_options):
+    # Built by the first task a worker runs, as ProcessPoolExecutor only takes
+    # an initializer from Python 3.7. A worker only ever serves one pool.
+    global _worker_parser
+    if _worker_parser is None:
+        _worker_parser = WiktionaryParser(**parser_options)
+        _worker_parser.set_language(language_code)
+    return _worker_parser
+
+
+def _parse_item(item, language, language_code, parser_options):
+    parser = _get_worker_parser(language_code, parser_options)
+    if len(item) == 2:
+        word, html = item
+        return parser.parse_html(html, word, language)
+    word, item_language, old_id = item
+    return parser.fetch(word, item_language or language, old_id)
+
+
+class ParserPool(object):
+    """Spread parsing over worker processes, each with its own WiktionaryParser.
+
+    Items are either (word, html) tuples, which are parsed as they are, or
+    (word, language, old_id) tuples, which the worker fetches first. At most
+    `max_in_flight` items are handed to the workers at a time, so results
+    stream back with flat memory use however long the input is. The keyword
+    arguments given after `language_code` are passed to each worker's parser
+    and must be picklable.
+    """
+
+    def __init__(self, processes=None, language_code=None, max_in_flight=None, **parser_options):
+        self.processes = processes or os.cpu_count() or 1
+        self.max_in_flight = max_in_flight or self.processes * 4
+        # Imported here because it imports multiprocessing, which is slow.
+        from concurrent.futures import ProcessPoolExecutor
+        self.language_code = language_code
+        self.parser_options = parser_options
+        self.executor = ProcessPoolExecutor(max_workers=self.processes)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.executor.shutdown()
+
+    def imap(self, items, language=None, ordered=True):
+        """Yield (word, result) for every item, in input order unless `ordered`
+        is False, in which case results come back as soon as they are ready.
+        When an item fails, its result is the raised exception."""
+        items = iter(items)
+        in_flight = deque()
+        while True:
+            for item in items:
+                in_flight.append((item[0], self.executor.submit(
+                    _parse_item, item, language, self.language_code, self.parser_options)))
+                if len(in_flight) >= self.max_in_flight:
+                    break
+            if not in_flight:
+                return
+            if ordered:
+                done = [in_flight.popleft()]
+            else:
+                finished, _ = wait([future for _, future in in_flight], return_when=FIRST_COMPLETED)
+                done = [entry for entry in in_flight if entry[1] in finished]
+                for entry in done:
+                    in_flight.remove(entry)
+            for word, future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = e
+                yield word, result
@@ -0,0 +1,75 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class ParserMetrics(object):
+    """Wall time and call counts of every stage of fetch and parse_html.
+
+    Stages are recorded both for the call in progress on the current thread and
+    cumulatively. When a top-level call finishes, its stages become available
+    from last_call() and are passed to `callback`, if one was given.
+    """
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.calls = 0
+        self.totals = {}
+
+    @contextmanager
+    def call(self, name):
+        depth = getattr(self.local, 'depth', 0)
+        if depth == 0:
+            self.local.current = {}
+        self.local.depth = depth + 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+            self.local.depth = depth
+            if depth == 0:
+                self.local.last_call = self.local.current
+                self.local.current = None
+                with self.lock:
+                    self.calls += 1
+                if self.callback is not None:
+                    self.callback(self.last_call())
+
+    @contextmanager
+    def measure(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def record(self, stage, seconds):
+        current = getattr(self.local, 'current', None)
+        if current is not None:
+            entry = current.setdefault(stage, [0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+        with self.lock:
+            entry = self.totals.setdefault(stage, [0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+
+    def last_call(self):
+        """Stages of the last top-level call made on this thread."""
+        stages = getattr(self.local, 'last_call', None) or {}
+        return {stage: {'count': count, 'seconds': seconds} for stage, (count, seconds) in stages.items()}
+
+    def as_dict(self):
+        with self.lock:
+            return {
+                'calls': self.calls,
+                'stages': {stage: {'count': count, 'seconds': seconds} for stage, (count, seconds) in self.totals.items()},
+            }
+
+    def reset(self):
+        with self.lock:
+            self.calls = 0
+            self.totals = {}
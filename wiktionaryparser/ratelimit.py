@@ -0,0 +1,185 @@
+import random
+import sqlite3
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+THROTTLE_STATUSES = (429, 503)
+
+
+def parse_retry_after(value, now=None):
+    """Seconds to wait from a Retry-After header, given in seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at - (time.time() if now is None else now))
+
+
+class RateLimiter(object):
+    """Token bucket rate limiter with backoff, kept separately for each host.
+
+    Each host may send `requests_per_second` requests on average, in bursts of
+    up to `burst`, unless `per_host` gives it its own rate, for example
+    {'en.wiktionary.org': 10, 'ro.wiktionary.org': 2}. When a host answers 429
+    or 503, requests to it pause for its Retry-After delay, or else for a
+    jittered exponential backoff, and are retried up to `max_retries` times.
+
+    One limiter can be shared by any number of parsers and threads. With
+    `path`, the buckets live in a sqlite file instead of in memory, so parsers
+    in other processes, such as ParserPool workers, share the same budgets.
+    The counters from stats() are those of this process.
+    """
+
+    def __init__(self, requests_per_second=5.0, burst=None, per_host=None, max_retries=5,
+                 backoff_base=1.0, backoff_max=60.0, path=None):
+        self.requests_per_second = requests_per_second
+        self.burst = burst if burst is not None else max(1.0, requests_per_second)
+        self.per_host = per_host or {}
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.path = path
+        self.lock = threading.Lock()
+        self.buckets = {}
+        self.connection = None
+        self.requests = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.throttled = 0
+        self.retries = 0
+
+    def __getstate__(self):
+        if self.path is None:
+            raise TypeError('Only a RateLimiter with a path can be shared between processes')
+        state = self.__dict__.copy()
+        state.update(lock=None, buckets={}, connection=None, requests=0, waits=0, wait_seconds=0.0,
+                     throttled=0, retries=0)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def get_rate(self, host):
+        return self.per_host.get(host, self.requests_per_second)
+
+    def reserve(self, host):
+        """Take a token for a request to `host` and return 0, or return how many
+        seconds to wait before trying again if none is available."""
+        rate = self.get_rate(host)
+        burst = max(self.burst, 1.0)
+        with self.lock:
+            now = time.time()
+            tokens, updated_at, blocked_until = self._load(host, now, burst)
+            tokens = min(burst, tokens + (now - updated_at) * rate)
+            if blocked_until > now:
+                delay = blocked_until - now
+            elif tokens >= 1:
+                tokens -= 1
+                self.requests += 1
+                delay = 0.0
+            else:
+                delay = (1 - tokens) / rate
+            self._save(host, tokens, now, blocked_until)
+            return delay
+
+    def acquire(self, host):
+        """Block until a request to `host` may be sent."""
+        waited = 0.0
+        delay = self.reserve(host)
+        while delay > 0:
+            time.sleep(delay)
+            waited += delay
+            delay = self.reserve(host)
+        if waited:
+            with self.lock:
+                self.waits += 1
+                self.wait_seconds += waited
+
+    async def acquire_async(self, host):
+        """Like acquire(), for coroutines."""
+        import asyncio
+        waited = 0.0
+        delay = self.reserve(host)
+        while delay > 0:
+            await asyncio.sleep(delay)
+            waited += delay
+            delay = self.reserve(host)
+        if waited:
+            with self.lock:
+                self.waits += 1
+                self.wait_seconds += waited
+
+    def is_throttled(self, status):
+        return status in THROTTLE_STATUSES
+
+    def should_retry(self, status, attempt):
+        return self.is_throttled(status) and attempt < self.max_retries
+
+    def throttle(self, host, retry_after=None, attempt=0):
+        """Pause requests to `host` after it answered 429 or 503 and return the
+        delay. Without a usable Retry-After, the delay is drawn uniformly
+        between 0 and backoff_base * 2 ** attempt, capped at backoff_max."""
+        delay = parse_retry_after(retry_after)
+        if delay is None:
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        with self.lock:
+            now = time.time()
+            _, _, blocked_until = self._load(host, now, max(self.burst, 1.0))
+            # Start again from an empty bucket, so requests resume at the steady rate.
+            self._save(host, 0.0, now, max(blocked_until, now + delay))
+            self.throttled += 1
+        return delay
+
+    def record_retry(self):
+        with self.lock:
+            self.retries += 1
+
+    def stats(self):
+        with self.lock:
+            return {
+                'requests': self.requests,
+                'waits': self.waits,
+                'wait_seconds': self.wait_seconds,
+                'throttled': self.throttled,
+                'retries': self.retries,
+            }
+
+    def _get_connection(self):
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS buckets '
+                '(host TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL, blocked_until REAL NOT NULL)')
+        return self.connection
+
+    def _load(self, host, now, burst):
+        if self.path is None:
+            return self.buckets.get(host, (burst, now, 0.0))
+        connection = self._get_connection()
+        # Held until _save commits, so other processes wait for this update.
+        connection.execute('BEGIN IMMEDIATE')
+        row = connection.execute(
+            'SELECT tokens, updated_at, blocked_until FROM buckets WHERE host = ?', (host,)).fetchone()
+        return row if row is not None else (burst, now, 0.0)
+
+    def _save(self, host, tokens, updated_at, blocked_until):
+        if self.path is None:
+            self.buckets[host] = (tokens, updated_at, blocked_until)
+            return
+        self.connection.execute(
+            'INSERT OR REPLACE INTO buckets (host, tokens, updated_at, blocked_until) VALUES (?, ?, ?, ?)',
+            (host, tokens, updated_at, blocked_until))
+        self.connection.execute('COMMIT')
@@ -1,4 +1,33 @@
+import json
+from collections.abc import Mapping
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _to_json_default(value):
+    if hasattr(value, 'to_json'):
+        return value.to_json()
+    if isinstance(value, Mapping):
+        return dict(value)
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def dumps(value):
+    """Serialize a result, including WordData objects, to compact UTF-8 JSON bytes.
+
+    Uses orjson when it is installed and the standard json module otherwise.
+    """
+    if orjson is not None:
+        return orjson.dumps(value, default=_to_json_default)
+    return json.dumps(value, default=_to_json_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
 class WordData(object):
+    __slots__ = ('etymology', '_definition_list', 'pronunciations', 'audio_links')
+
     def __init__(self, etymology=None, definitions=None, pronunciations=None,
                  audio_links=None):
         self.etymology = etymology if etymology else ''
@@ -33,8 +62,15 @@ class WordData(object):
             }
         }
 
+    @classmethod
+    def from_json(cls, data):
+        return cls(data['etymology'], [Definition.from_json(definition) for definition in data['definitions']],
+                   data['pronunciations']['text'], data['pronunciations']['audio'])
+
 
 class Definition(object):
+    __slots__ = ('part_of_speech', 'text', '_related_words', 'example_uses')
+
     def __init__(self, part_of_speech = None, text = None, related_words = None, example_uses = None):
         self.part_of_speech = part_of_speech if part_of_speech else ''
         self.text = text if text else ''
@@ -66,8 +102,15 @@ class Definition(object):
             'examples': self.example_uses 
         }
 
+    @classmethod
+    def from_json(cls, data):
+        return cls(data['partOfSpeech'], data['text'],
+                   [RelatedWord.from_json(related_word) for related_word in data['relatedWords']], data['examples'])
+
 
 class RelatedWord(object):
+    __slots__ = ('relationship_type', 'words')
+
     def __init__(self, relationship_type=None, words=None):
         self.relationship_type = relationship_type if relationship_type else ''
         self.words = words if words else []
@@ -76,4 +119,8 @@ class RelatedWord(object):
         return {
             'relationshipType': self.relationship_type,
             'words': self.words
-        }
\ No newline at end of file
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(data['relationshipType'], data['words'])